@@ -0,0 +1,117 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import get_cache, get_state_cache, get_versions
+
+USER_RESOURCE = 'user:{}'
+USER_KEY = 'api:user:{}:{}'
+REVOKED_KEY = 'api:revoked-token:{}'
+
+
+class LRUCache:
+    """Ограниченный по числу записей словарь, вытесняющий самые старые.
+
+    Запись, сохранённая с timeout (в секундах), после него не находится.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_users = LRUCache(getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024))
+verified_tokens = LRUCache(getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 4096))
+
+
+def revoke_token(token):
+    """Отзывает токен до истечения его срока во всех процессах."""
+    remaining = token.get('exp', 0) - time.time()
+    if remaining > 0:
+        get_state_cache().set(
+            REVOKED_KEY.format(token[api_settings.JTI_CLAIM]), True,
+            int(remaining) + 1
+        )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, берущая пользователя из кэша, а не из БД.
+
+    Проверенные токены хранятся в LRU процесса по sha256 от токена до
+    истечения срока (exp), так что подпись проверяется один раз на
+    токен. Отзыв (revoke_token) проверяется в общем кэше на каждом
+    запросе.
+
+    Пользователь ищется в LRU процесса, затем в общем кэше и только
+    потом в БД; в обоих кэшах он живёт AUTH_USER_CACHE_TIMEOUT. Ключ
+    содержит версии 'users' и 'user:<id>', которые повышают сигналы
+    api.signals при сохранении и удалении пользователя и после массовой
+    загрузки данных: устаревшие записи просто перестают находиться.
+    """
+
+    def get_validated_token(self, raw_token):
+        digest = hashlib.sha256(raw_token).hexdigest()
+        entry = verified_tokens.get(digest)
+        if entry is None or entry[1] <= time.time():
+            # Истёкший токен не пройдёт проверку и здесь.
+            token = super().get_validated_token(raw_token)
+            entry = (token, token.get('exp', 0))
+            verified_tokens.set(digest, entry)
+        token = entry[0]
+        jti = token.get(api_settings.JTI_CLAIM)
+        if jti and get_state_cache().get(REVOKED_KEY.format(jti)):
+            raise InvalidToken('Токен отозван.')
+        return token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        versions = get_versions('users', USER_RESOURCE.format(user_id))
+        if None in versions:
+            # Кэш не хранит значений (DummyCache): версиям нельзя верить.
+            return super().get_user(validated_token)
+        key = USER_KEY.format(user_id, ':'.join(map(str, versions)))
+        user = local_users.get(key)
+        if user is None:
+            timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60 * 5)
+            cache = get_cache()
+            user = cache.get(key)
+            if user is None:
+                user = super().get_user(validated_token)
+                cache.set(key, user, timeout)
+            local_users.set(key, user, timeout)
+        # Представления меняют request.user, общий экземпляр трогать нельзя.
+        return copy.copy(user)
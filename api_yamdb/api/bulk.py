@@ -0,0 +1,127 @@
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from reviews.models import Category, Genre, GenreTitle, Leaderboard, Title
+from reviews.search import get_search_backend
+from .cache import bump_versions
+from .serializers import TitleBulkSerializer
+
+BULK_MAX_ITEMS = 1000
+TITLE_FIELDS = ('name', 'year', 'description', 'category')
+
+
+def check_item(item, error, partial, titles, categories, genres):
+    """Проверяет ссылки элемента и заменяет слаги объектами."""
+    if partial and item.get('id') not in titles:
+        error['id'] = ['Произведение не найдено.']
+    if not partial and 'category' not in item:
+        error['category'] = ['Обязательное поле.']
+    elif 'category' in item and item['category'] not in categories:
+        error['category'] = [f'Категория {item["category"]} не найдена.']
+    missing = [slug for slug in item.get('genre', ()) if slug not in genres]
+    if missing:
+        error['genre'] = [f'Жанр {slug} не найден.' for slug in missing]
+    if 'category' in item and 'category' not in error:
+        item['category'] = categories[item['category']]
+    if 'genre' in item and 'genre' not in error:
+        item['genre'] = list(dict.fromkeys(
+            genres[slug] for slug in item['genre']
+        ))
+
+
+def validate_items(items, partial):
+    if not isinstance(items, list) or not items:
+        raise ValidationError('Ожидается непустой список произведений.')
+    if len(items) > BULK_MAX_ITEMS:
+        raise ValidationError(
+            f'За один запрос можно передать не более {BULK_MAX_ITEMS} '
+            'произведений.'
+        )
+    serializers = [TitleBulkSerializer(data=item, partial=partial)
+                   for item in items]
+    errors = [{} if serializer.is_valid() else dict(serializer.errors)
+              for serializer in serializers]
+    data = [serializer.validated_data if not error else {}
+            for serializer, error in zip(serializers, errors)]
+
+    categories = Category.objects.in_bulk(
+        {item['category'] for item in data if 'category' in item},
+        field_name='slug'
+    )
+    genres = Genre.objects.in_bulk(
+        {slug for item in data for slug in item.get('genre', ())},
+        field_name='slug'
+    )
+    titles = Title.objects.in_bulk(
+        [item['id'] for item in data if 'id' in item]
+    ) if partial else {}
+
+    for item, error in zip(data, errors):
+        if not error:
+            check_item(item, error, partial, titles, categories, genres)
+    if any(errors):
+        raise ValidationError(errors)
+    return data, titles
+
+
+def bulk_create_titles(items):
+    """Создаёт произведения с жанрами: по запросу на справочник и таблицу."""
+    data, _ = validate_items(items, partial=False)
+    titles = [Title(**{field: item[field] for field in TITLE_FIELDS
+                       if field in item}) for item in data]
+    with transaction.atomic():
+        Title.objects.bulk_create(titles)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # Без RETURNING bulk_create не возвращает id, а они нужны для
+            # связей. После вставки транзакция держит блокировку записи,
+            # поэтому последние len(titles) id — наши, по порядку.
+            ids = Title.objects.order_by('-pk').values_list(
+                'pk', flat=True
+            )[:len(titles)]
+            for title, pk in zip(titles, reversed(ids)):
+                title.pk = pk
+        save_genres(titles, data)
+        after_bulk_save(titles)
+    return titles
+
+
+def bulk_update_titles(items):
+    """Частично обновляет произведения одним bulk_update."""
+    data, found = validate_items(items, partial=True)
+    titles = []
+    fields = {'updated_at'}
+    now = timezone.now()
+    for item in data:
+        title = found[item['id']]
+        for field in TITLE_FIELDS:
+            if field in item:
+                setattr(title, field, item[field])
+                fields.add(field)
+        title.updated_at = now
+        titles.append(title)
+    with transaction.atomic():
+        Title.objects.bulk_update(titles, fields)
+        save_genres(titles, data)
+        after_bulk_save(titles)
+    return titles
+
+
+def save_genres(titles, data):
+    changed = [(title, item['genre'])
+               for title, item in zip(titles, data) if 'genre' in item]
+    GenreTitle.objects.filter(
+        title__in=[title for title, _ in changed]
+    ).delete()
+    GenreTitle.objects.bulk_create([
+        GenreTitle(title=title, genre=genre)
+        for title, genres in changed for genre in genres
+    ])
+
+
+def after_bulk_save(titles):
+    # bulk_create и bulk_update не отправляют сигналы моделей. Индекс
+    # и лидеры пишутся в той же транзакции, что и сами произведения.
+    get_search_backend().index_many(titles)
+    Leaderboard.objects.refresh([title.pk for title in titles])
+    bump_versions('titles')
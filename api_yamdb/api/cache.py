@@ -0,0 +1,111 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .conditional import conditional_response
+
+VERSION_KEY = 'api:version:{}'
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def get_state_cache():
+    """Кэш для записей, которые нельзя терять при вытеснении."""
+    return caches[getattr(settings, 'API_STATE_CACHE_ALIAS', 'default')]
+
+
+def get_versions(*resources):
+    """Текущие версии ресурсов; отсутствующие заводятся заново.
+
+    Начальное значение берётся от времени, чтобы после вытеснения счётчика
+    из кэша версия не совпала с одной из уже выданных.
+    """
+    cache = get_state_cache()
+    keys = [VERSION_KEY.format(resource) for resource in resources]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*resources):
+    """Инвалидирует закэшированные ответы ресурсов после фиксации транзакции.
+
+    До фиксации параллельный запрос мог бы закэшировать старые данные
+    под новой версией.
+    """
+    def bump():
+        cache = get_state_cache()
+        keys = [VERSION_KEY.format(resource) for resource in resources]
+        versions = cache.get_many(keys)
+        # Не incr: у кэшей без своего incr (FileBasedCache) он
+        # перезаписывает ключ со сроком по умолчанию, и счётчик истёк бы.
+        cache.set_many({
+            key: versions[key] + 1 if key in versions else time.time_ns()
+            for key in keys
+        }, timeout=None)
+    transaction.on_commit(bump)
+
+
+def get_request_key(request, resources, prefix='api:response'):
+    query = urlencode(sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    ))
+    versions = ':'.join(map(str, get_versions(*resources)))
+    digest = hashlib.sha1(
+        f'{request.path}?{query}#{versions}'.encode()
+    ).hexdigest()
+    return f'{prefix}:{digest}'
+
+
+class CachedListMixin:
+    """Кэширует ответы list на анонимные GET-запросы.
+
+    Ключ — путь, нормализованная строка запроса и версии ресурсов из
+    cache_resources, которые повышаются при изменении данных.
+    """
+    cache_resources = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = get_request_key(request, self.cache_resources)
+        entry = cache.get(key)
+        if entry is not None:
+            data, headers = entry
+            return conditional_response(
+                request, headers, lambda: Response(data)
+            )
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {name: response[name] for name in CACHED_HEADERS
+                       if response.has_header(name)}
+            cache.set(key, (response.data, headers), getattr(
+                settings, 'API_CACHE_TIMEOUT', 60 * 15
+            ))
+        return response
+
+
+class CachedResponseMixin(CachedListMixin):
+    """Кэширует ответы list и retrieve на анонимные GET-запросы."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,108 @@
+import hashlib
+
+from django.db.models import prefetch_related_objects
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_headers(request, key, last_modified):
+    """Строгий ETag и Last-Modified по ключу и времени изменения строк."""
+    digest = hashlib.sha1(
+        f'{key}:{request.accepted_renderer.format}'.encode()
+    ).hexdigest()
+    headers = {'ETag': f'"{digest}"'}
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return headers
+
+
+def is_not_modified(request, headers):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or headers['ETag'] in etags
+    if_modified_since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+    )
+    last_modified = parse_http_date_safe(headers.get('Last-Modified', ''))
+    return (if_modified_since is not None and last_modified is not None
+            and last_modified <= if_modified_since)
+
+
+def conditional_response(request, headers, render):
+    """304 без вызова render, если клиентская копия актуальна."""
+    if is_not_modified(request, headers):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response = render()
+    if response.status_code == status.HTTP_200_OK:
+        for name, value in headers.items():
+            response[name] = value
+    return response
+
+
+class ConditionalListMixin:
+    """Условный GET для list по странице, которую список и так выбирает.
+
+    Страница выбирается без prefetch_related; ETag строится по ссылкам
+    пагинатора (с count), id и updated_at строк страницы и версиям
+    связанных строк из get_related_versions. Last-Modified у списка нет:
+    наибольший updated_at страницы уменьшается при удалении строки.
+    Если клиентская копия актуальна, связи не подгружаются и ответ не
+    сериализуется; иначе связи подгружаются к той же странице.
+    """
+
+    def get_related_versions(self, instances):
+        """Версии строк, которые ответ выводит вместе с instances.
+
+        None среди версий (кэш их не хранит) отключает условный GET.
+        """
+        return []
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookups = queryset._prefetch_related_lookups
+        page = self.paginate_queryset(queryset.prefetch_related(None))
+        if page is None:
+            return super().list(request, *args, **kwargs)
+
+        def render():
+            prefetch_related_objects(page, *lookups)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        versions = self.get_related_versions(page)
+        if None in versions:
+            return render()
+        links = self.get_paginated_response([]).data
+        rows = [(instance.pk, instance.updated_at.isoformat())
+                for instance in page]
+        headers = make_headers(request, (
+            f'{request.get_full_path()}:'
+            f'{sorted((name, str(value)) for name, value in links.items())}:'
+            f'{rows}:{versions}'
+        ), None)
+        return conditional_response(request, headers, render)
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """Условный GET для list и retrieve по updated_at строк.
+
+    Last-Modified у retrieve есть, только если ответ не выводит связанных
+    строк: их изменения не двигают updated_at объекта.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        def render():
+            return Response(self.get_serializer(instance).data)
+
+        versions = self.get_related_versions([instance])
+        if None in versions:
+            return render()
+        headers = make_headers(request, (
+            f'{instance._meta.label}:{instance.pk}:'
+            f'{instance.updated_at.isoformat()}:{versions}'
+        ), None if versions else instance.updated_at)
+        return conditional_response(request, headers, render)
@@ -1,16 +1,21 @@
 import django_filters
 
 from reviews.models import Title
+from reviews.search import get_search_backend
 
 
 class TitleFilter(django_filters.FilterSet):
     category = django_filters.CharFilter(field_name='category__slug')
     genre = django_filters.CharFilter(field_name='genre__slug')
-    name = django_filters.CharFilter(
-        field_name='name',
-        lookup_expr='contains'
-    )
+    name = django_filters.CharFilter(method='filter_name')
+    search = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year')
+
+    def filter_name(self, queryset, name, value):
+        return get_search_backend().search(queryset, value)
+
+    def filter_search(self, queryset, name, value):
+        return get_search_backend().search(queryset, value, rank=True)
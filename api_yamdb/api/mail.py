@@ -0,0 +1,119 @@
+import json
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
+
+from reviews.models import OutboxEmail
+
+SPOOL_SUFFIX = '.json'
+SENDING_SUFFIX = '.sending'
+MESSAGE_FIELDS = ('subject', 'body', 'from_email', 'to', 'cc', 'bcc',
+                  'reply_to', 'extra_headers')
+
+
+def get_spool_dir():
+    return str(settings.EMAIL_SPOOL_DIR)
+
+
+class SpoolEmailBackend(BaseEmailBackend):
+    """Складывает письма в каталог EMAIL_SPOOL_DIR вместо отправки.
+
+    Отправляет их пачками команда flush_mail. Вложения не
+    поддерживаются: письма API текстовые.
+    """
+
+    def send_messages(self, email_messages):
+        directory = get_spool_dir()
+        os.makedirs(directory, exist_ok=True)
+        count = 0
+        for message in email_messages:
+            if message.attachments or getattr(message, 'alternatives', None):
+                if self.fail_silently:
+                    continue
+                raise ValueError('Письма с вложениями нельзя поставить '
+                                 'в очередь на отправку.')
+            name = f'{time.time_ns():020d}-{uuid.uuid4().hex}'
+            path = os.path.join(directory, name)
+            with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+                json.dump({field: getattr(message, field)
+                           for field in MESSAGE_FIELDS},
+                          file, ensure_ascii=False)
+            # Переименование атомарно: flush_mail не увидит недописанный файл.
+            os.replace(f'{path}.tmp', f'{path}{SPOOL_SUFFIX}')
+            count += 1
+        return count
+
+
+def spooled_path(path):
+    """Путь письма в очереди по пути захваченного файла."""
+    return path[:path.rindex(SPOOL_SUFFIX) + len(SPOOL_SUFFIX)]
+
+
+def claimed_at(path):
+    """Время захвата из имени <письмо>.json.<наносекунды>.sending."""
+    try:
+        return int(path[:-len(SENDING_SUFFIX)].rsplit('.', 1)[1]) / 1e9
+    except ValueError:
+        return 0
+
+
+def claim_spooled(directory, stale_after=600):
+    """Забирает письма из каталога, переименовывая их в .sending.
+
+    Время захвата пишется в новое имя, а переименование атомарно: из
+    двух flush_mail файл получит один, у второго rename не найдёт его.
+    Так же, новым переименованием, забираются повторно файлы .sending
+    старше stale_after секунд (упавшая отправка). Возвращает пути
+    в порядке постановки в очередь.
+    """
+    if not os.path.isdir(directory):
+        return []
+    claimed = []
+    now = time.time()
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith(SENDING_SUFFIX):
+            if now - claimed_at(path) <= stale_after:
+                continue
+        elif not name.endswith(SPOOL_SUFFIX):
+            continue
+        target = f'{spooled_path(path)}.{time.time_ns()}{SENDING_SUFFIX}'
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            continue
+        claimed.append(target)
+    return claimed
+
+
+def load_message(path):
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    data['headers'] = data.pop('extra_headers')
+    return EmailMessage(**data)
+
+
+def coalesce(paths):
+    """Оставляет из писем с одним ключом объединения и получателями последнее.
+
+    Ключ ставит OutboxEmail.enqueue в заголовок OutboxEmail.COALESCE_HEADER:
+    так повторные запросы кода подтверждения дают одно письмо с последним
+    кодом. Письма без заголовка отправляются все. Возвращает пары
+    (письмо, пути его и дублей).
+    """
+    latest = {}
+    for path in paths:
+        message = load_message(path)
+        marker = message.extra_headers.pop(OutboxEmail.COALESCE_HEADER, None)
+        if marker is None:
+            key = path
+        else:
+            key = (marker, tuple(sorted(message.recipients())))
+        _, duplicates = latest.pop(key, (None, []))
+        # pop и вставка переносят письмо в конец: порядок — по последнему.
+        latest[key] = (message, duplicates + [path])
+    return list(latest.values())
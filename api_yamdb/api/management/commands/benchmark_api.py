@@ -0,0 +1,248 @@
+import json
+from collections import namedtuple
+from itertools import count
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.urls import router_v1
+from reviews.models import Category, Genre, Review, Title, User
+
+# name — имя в отчёте, route — имя маршрута роутера (для проверки, что
+# замерены все), data — тело запроса или функция, возвращающая новое.
+Case = namedtuple('Case', 'name method route path data auth',
+                  defaults=(None, False))
+
+# Маршруты роутера, которые меняют данные и в замеры не входят.
+WRITE_ONLY_ROUTES = {'title-bulk', 'genre-detail', 'category-detail'}
+DATASET = (('users', 2000), ('titles', 2000), ('reviews', 50000),
+           ('comments', 20000))
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, round(share * (len(values) - 1)))]
+
+
+def rows_fetched(queries):
+    """Число строк, которые вернули SELECT-запросы; запросы повторяются."""
+    total = 0
+    with connection.cursor() as cursor:
+        for query in queries:
+            if query['sql'].lstrip().upper().startswith('SELECT'):
+                cursor.execute(query['sql'])
+                total += len(cursor.fetchall())
+    return total
+
+
+def get_cases():
+    """Сценарии на данных БД: самое популярное произведение и т. п."""
+    title = Title.objects.order_by('-score_count', 'pk').first()
+    review = Review.objects.filter(title=title).annotate(
+        comment_count=Count('comments')
+    ).order_by('-comment_count', 'pk').first()
+    if review is None:
+        raise CommandError('В БД нет произведений с отзывами.')
+    comment = review.comments.order_by('pk').first()
+    genre = Genre.objects.order_by('pk').first()
+    category = Category.objects.order_by('pk').first()
+    user = User.objects.exclude(role='admin').order_by('pk').first()
+    word = title.name.split()[0]
+    signups = count()
+
+    def signup():
+        number = next(signups)
+        return {'username': f'bench{number}',
+                'email': f'bench{number}@yamdb.fake'}
+
+    title_url = f'/api/v1/titles/{title.pk}/'
+    review_url = f'{title_url}reviews/{review.pk}/'
+    return (
+        Case('api-root', 'get', 'api-root', '/api/v1/'),
+        Case('genre-list', 'get', 'genre-list', '/api/v1/genres/'),
+        Case('genre-list-search', 'get', 'genre-list',
+             f'/api/v1/genres/?search={genre.name}'),
+        Case('category-list', 'get', 'category-list', '/api/v1/categories/'),
+        Case('title-list', 'get', 'title-list', '/api/v1/titles/'),
+        Case('title-list-genre', 'get', 'title-list',
+             f'/api/v1/titles/?genre={genre.slug}'),
+        Case('title-list-category', 'get', 'title-list',
+             f'/api/v1/titles/?category={category.slug}'),
+        Case('title-list-year', 'get', 'title-list',
+             f'/api/v1/titles/?year={title.year}'),
+        Case('title-list-name', 'get', 'title-list',
+             f'/api/v1/titles/?name={word}'),
+        Case('title-list-offset', 'get', 'title-list',
+             '/api/v1/titles/?limit=10&offset=1000'),
+        Case('title-detail', 'get', 'title-detail', title_url),
+        Case('title-scores', 'get', 'title-scores', f'{title_url}scores/'),
+        Case('title-top', 'get', 'title-top', '/api/v1/titles/top/'),
+        Case('title-top-genre', 'get', 'title-top',
+             f'/api/v1/titles/top/?genre={genre.slug}'),
+        Case('reviews-list', 'get', 'reviews-list', f'{title_url}reviews/'),
+        Case('reviews-detail', 'get', 'reviews-detail', review_url),
+        Case('comments-list', 'get', 'comments-list',
+             f'{review_url}comments/'),
+        Case('comments-detail', 'get', 'comments-detail',
+             comment and f'{review_url}comments/{comment.pk}/'),
+        Case('user-list', 'get', 'user-list', '/api/v1/users/', auth=True),
+        Case('user-list-search', 'get', 'user-list',
+             f'/api/v1/users/?search={user.username}', auth=True),
+        Case('user-detail', 'get', 'user-detail',
+             f'/api/v1/users/{user.username}/', auth=True),
+        Case('user-get-current-user-info', 'get',
+             'user-get-current-user-info', '/api/v1/users/me/', auth=True),
+        Case('signup', 'post', 'signup', '/api/v1/auth/signup/',
+             data=signup),
+        Case('signup-existing', 'post', 'signup', '/api/v1/auth/signup/',
+             data={'username': user.username, 'email': user.email}),
+        Case('get-token', 'post', 'get_token', '/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': user.confirmation_code,
+        }),
+    )
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку (p50/p95), число SQL-запросов и выбранных '
+            'строк для маршрутов API на сгенерированных данных и пишет '
+            'результат в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='benchmark.json',
+                            help='Файл для результатов.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Сколько раз повторять каждый запрос.')
+        parser.add_argument('--seed', type=int, default=0)
+        for name, default in DATASET:
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько строк {name} сгенерировать.'
+            )
+        parser.add_argument(
+            '--current-db', action='store_true',
+            help=('Работать в текущей БД вместо отдельной тестовой, '
+                  'которая создаётся и удаляется командой.')
+        )
+        parser.add_argument(
+            '--no-generate', action='store_true',
+            help='Не генерировать данные (вместе с --current-db).'
+        )
+        parser.add_argument(
+            '--cache', action='store_true',
+            help=('Не отключать кэш ответов: без него замеряется работа '
+                  'с БД, а не попадания в кэш.')
+        )
+
+    def handle(self, *args, **options):
+        overrides = {
+            'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend',
+            # Повторы одного запроса упираются в лимиты частоты, и вместо
+            # работы представления замерялись бы ответы 429.
+            'REST_FRAMEWORK': {
+                **settings.REST_FRAMEWORK,
+                'DEFAULT_THROTTLE_RATES': dict.fromkeys(
+                    settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {})
+                ),
+            },
+        }
+        if not options['cache']:
+            overrides['CACHES'] = {
+                alias: {
+                    'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+                }
+                for alias in ('default', 'state')
+            }
+        old_name = connection.settings_dict['NAME']
+        if not options['current_db']:
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(**overrides):
+                results = self.run(options)
+        finally:
+            if not options['current_db']:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2,
+                      sort_keys=True)
+            file.write('\n')
+        self.stdout.write(f'Результаты записаны в {options["output"]}')
+
+    def run(self, options):
+        if not options['no_generate']:
+            call_command(
+                'generate_data', seed=options['seed'], stdout=self.stdout,
+                **{name: options[name] for name, _ in DATASET}
+            )
+        cases = get_cases()
+        missing = {
+            url.name for url in router_v1.urls
+        } - WRITE_ONLY_ROUTES - {case.route for case in cases}
+        if missing:
+            raise CommandError(
+                f'Нет сценариев для маршрутов: {", ".join(sorted(missing))}.'
+            )
+        admin, _ = User.objects.get_or_create(
+            username='benchmark-admin',
+            defaults={'email': 'benchmark-admin@yamdb.fake', 'role': 'admin'}
+        )
+        token = RefreshToken.for_user(admin).access_token
+        anonymous, client = APIClient(), APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        routes = {}
+        for case in cases:
+            if case.path is None:
+                continue
+            routes[case.name] = self.measure(
+                client if case.auth else anonymous, case, options['repeat']
+            )
+            self.stdout.write(
+                '{name}: p50 {p50_ms} мс, p95 {p95_ms} мс, запросов '
+                '{queries}, строк {rows}'.format(
+                    name=case.name, **routes[case.name]
+                )
+            )
+        return {
+            'meta': {
+                'vendor': connection.vendor,
+                'repeat': options['repeat'],
+                'seed': options['seed'],
+                'dataset': {name: options[name] for name, _ in DATASET},
+            },
+            'routes': routes,
+        }
+
+    def measure(self, client, case, repeat):
+        def request():
+            if case.method == 'get':
+                return client.get(case.path)
+            data = case.data() if callable(case.data) else case.data
+            return client.post(case.path, data=data, format='json')
+
+        request()
+        timings, errors = [], 0
+        for _ in range(repeat):
+            started = perf_counter()
+            response = request()
+            timings.append((perf_counter() - started) * 1000)
+            errors += not status.is_success(response.status_code)
+        with CaptureQueriesContext(connection) as context:
+            response = request()
+        errors += not status.is_success(response.status_code)
+        return {
+            'method': case.method.upper(),
+            'path': case.path,
+            'status': response.status_code,
+            'errors': errors,
+            'p50_ms': round(percentile(timings, 0.5), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'queries': len(context.captured_queries),
+            'rows': rows_fetched(context.captured_queries),
+        }
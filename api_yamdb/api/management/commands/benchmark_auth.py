@@ -0,0 +1,43 @@
+from time import process_time
+
+from django.core.management import BaseCommand
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import CachedJWTAuthentication, verified_tokens
+
+
+def cpu_per_call(function, argument, repeat):
+    """Процессорное время одного вызова, в микросекундах."""
+    started = process_time()
+    for _ in range(repeat):
+        function(argument)
+    return (process_time() - started) / repeat * 1e6
+
+
+class Command(BaseCommand):
+    help = ('Замеряет процессорное время проверки JWT-токена на запрос: '
+            'разбор и проверку подписи против кэша проверенных токенов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10000,
+                            help='Сколько раз проверять токен.')
+
+    def handle(self, *args, **options):
+        token = AccessToken()
+        token['user_id'] = 1
+        raw_token = str(token).encode()
+        repeat = options['repeat']
+
+        verify = cpu_per_call(
+            JWTAuthentication().get_validated_token, raw_token, repeat
+        )
+        verified_tokens.clear()
+        cached = cpu_per_call(
+            CachedJWTAuthentication().get_validated_token, raw_token, repeat
+        )
+        self.stdout.write(
+            f'Проверка подписи: {verify:.1f} мкс, из кэша: {cached:.1f} мкс, '
+            f'экономия на запрос: {verify - cached:.1f} мкс '
+            f'({(verify - cached) / verify:.0%})'
+        )
@@ -0,0 +1,52 @@
+import os
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management import BaseCommand, CommandError
+
+from api.mail import claim_spooled, coalesce, get_spool_dir, spooled_path
+
+
+def release(items):
+    """Возвращает письма в каталог для следующего запуска."""
+    for _, paths in items:
+        for path in paths:
+            os.rename(path, spooled_path(path))
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма, накопленные SpoolEmailBackend: пачками, по '
+            'одному SMTP-соединению на пачку, без повторных писем с кодом '
+            'на один адрес.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько писем отправлять за одно соединение.'
+        )
+
+    def handle(self, *args, **options):
+        paths = claim_spooled(get_spool_dir())
+        items = coalesce(paths)
+        size = options['batch_size']
+        sent = 0
+        for start in range(0, len(items), size):
+            batch = items[start:start + size]
+            connection = get_connection(settings.EMAIL_SPOOL_BACKEND)
+            try:
+                sent += connection.send_messages(
+                    [message for message, _ in batch]
+                )
+            except Exception as error:
+                release(items[start:])
+                raise CommandError(
+                    f'Отправлено писем: {sent}, остальные возвращены '
+                    f'в очередь: {error!r}'
+                )
+            for _, batch_paths in batch:
+                for path in batch_paths:
+                    os.remove(path)
+        self.stdout.write(
+            f'Отправлено писем: {sent}, '
+            f'объединено повторных: {len(paths) - len(items)}'
+        )
@@ -0,0 +1,84 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+
+class Timing:
+    """Замеры одного запроса, в секундах."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.view_started = self.view_finished = self.rendered = None
+        # Время БД на момент начала и конца работы представления.
+        self.db_before_view = self.db_after_view = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += perf_counter() - started
+            self.queries += 1
+
+    def header(self, finished):
+        if self.view_finished is None:
+            # Ответ не требует рендеринга: представление шло до конца.
+            self.view_finished, self.db_after_view = finished, self.db
+        view_db = self.db_after_view - self.db_before_view
+        metrics = [
+            ('db', self.db),
+            # Весь код представления без времени запросов к БД:
+            # аутентификация, права, лимиты, фильтры, пагинация
+            # и сериализаторы.
+            ('view', (self.view_finished - self.view_started - view_db)
+             if self.view_started else None),
+            ('render', (self.rendered - self.view_finished)
+             if self.rendered else None),
+            ('total', finished - self.started),
+        ]
+        parts = [f'{name};dur={value * 1000:.2f}'
+                 for name, value in metrics if value is not None]
+        parts.insert(1, f'queries;desc="{self.queries}"')
+        return ', '.join(parts)
+
+
+class ServerTimingMiddleware:
+    """Заголовок Server-Timing: БД, представление, рендеринг, число запросов.
+
+    Включается настройкой SERVER_TIMING. Запросы к БД считаются через
+    execute_wrapper, фазы разделяются process_view,
+    process_template_response и обратным вызовом после рендеринга
+    ответа DRF.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = request.server_timing = Timing()
+        with connection.execute_wrapper(timing):
+            response = self.get_response(request)
+        response['Server-Timing'] = timing.header(perf_counter())
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = request.server_timing
+        timing.view_started = perf_counter()
+        timing.db_before_view = timing.db
+
+    def process_template_response(self, request, response):
+        timing = request.server_timing
+        timing.view_finished = perf_counter()
+        timing.db_after_view = timing.db
+
+        def rendered(response):
+            timing.rendered = perf_counter()
+
+        response.add_post_render_callback(rendered)
+        return response
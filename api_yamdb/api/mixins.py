@@ -0,0 +1,145 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from rest_framework import serializers
+
+from reviews.models import Review, Title
+from .authentication import USER_RESOURCE
+from .cache import get_versions
+
+
+def _classify(field, path):
+    """select_related, prefetch и столбцы связей для одного поля."""
+    if isinstance(field, serializers.ListSerializer):
+        return [], [(path, type(field.child))], []
+    if isinstance(field, serializers.ManyRelatedField):
+        return [], [(path, None)], []
+    if isinstance(field, serializers.BaseSerializer):
+        select, prefetch, only = _collect(field, f'{path}__')
+        return [path, *select], prefetch, only
+    if isinstance(field, serializers.RelatedField):
+        slug_field = getattr(field, 'slug_field', None)
+        return [path], [], [f'{path}__{slug_field or "pk"}']
+    return [], [], []
+
+
+def _collect(serializer, prefix=''):
+    """Разбирает поля сериализатора на select_related, prefetch и only.
+
+    prefetch — пары (путь, класс сериализатора вложенных объектов или None).
+    """
+    model = serializer.Meta.model
+    select, prefetch, local, related = [], [], [model._meta.pk.name], []
+    restrict = True
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            # Свойства и аннотации: какие столбцы им нужны — неизвестно.
+            restrict = False
+            continue
+        field_select, field_prefetch, field_related = _classify(
+            field, f'{prefix}{field.source}'
+        )
+        select += field_select
+        prefetch += field_prefetch
+        related += field_related
+        if model_field.concrete:
+            local.append(field.source)
+    if not restrict:
+        local = [field.name for field in model._meta.concrete_fields]
+    return select, prefetch, [f'{prefix}{name}' for name in local] + related
+
+
+@lru_cache(maxsize=None)
+def get_loading_plan(serializer_class):
+    select, prefetch, only = _collect(serializer_class())
+    return tuple(select), tuple(prefetch), tuple(only)
+
+
+def eager_load(queryset, serializer_class):
+    """Подгружает связи, которые выведет сериализатор, за константу запросов.
+
+    Столбцы основной модели не ограничиваются: они нужны не только
+    сериализатору, но и проверкам прав и сигналам.
+    """
+    select, prefetch, only = get_loading_plan(serializer_class)
+    if not select and not prefetch:
+        return queryset
+    columns = [field.name for field in queryset.model._meta.concrete_fields]
+    columns += [name for name in only if '__' in name]
+    lookups = [
+        Prefetch(path, queryset=eager_load(
+            child.Meta.model.objects.all(), child
+        )) if child else path
+        for path, child in prefetch
+    ]
+    return queryset.select_related(*select).prefetch_related(
+        *lookups
+    ).only(*columns)
+
+
+class EagerLoadingMixin:
+    """Применяет eager_load к queryset вьюсета по его сериализатору."""
+
+    def get_queryset(self):
+        return eager_load(super().get_queryset(), self.get_serializer_class())
+
+
+class AuthorVersionsMixin:
+    """Включает в условный GET версии авторов: ответ выводит их username."""
+
+    def get_related_versions(self, instances):
+        return get_versions(*(
+            USER_RESOURCE.format(author_id)
+            for author_id in sorted({
+                instance.author_id for instance in instances
+            })
+        ))
+
+
+class TitleNestedMixin:
+    """Находит произведение из URL один раз за запрос.
+
+    Объект кэшируется на вьюсете и передаётся в контекст сериализатора.
+    """
+
+    def get_title(self):
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, id=self.kwargs.get('title_id')
+            )
+        return self._title
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['title'] = self.get_title()
+        return context
+
+
+class ReviewNestedMixin(TitleNestedMixin):
+    """Находит отзыв вместе с произведением одним запросом.
+
+    Отзыв другого произведения даёт 404.
+    """
+
+    def get_review(self):
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.select_related('title'),
+                id=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+            )
+        return self._review
+
+    def get_title(self):
+        return self.get_review().title
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['review'] = self.get_review()
+        return context
@@ -0,0 +1,169 @@
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу (столбец сортировки, id) без COUNT и OFFSET.
+
+    Курсор — непрозрачная строка с ключом крайней записи страницы и
+    направлением. Порядок задаётся атрибутом вьюсета keyset_ordering,
+    последним полем в нём должно быть уникальное (обычно id).
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = 100
+    ordering = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.convert_position(queryset.model, position)
+
+        ordering = [self.flip(field) if reverse else field
+                    for field in self.ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+        page = list(queryset[:self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[:self.limit]
+        if reverse:
+            page.reverse()
+
+        self.next_position = self.previous_position = None
+        if page and (has_more or reverse):
+            self.next_position = self.get_key(page[-1])
+        if page and (has_more if reverse else position is not None):
+            self.previous_position = self.get_key(page[0])
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.encode_cursor(self.next_position, reverse=False),
+            'previous': self.encode_cursor(
+                self.previous_position, reverse=True
+            ),
+            'results': data,
+        })
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def after(ordering, position):
+        """Условие «строго после ключа» для сортировки ordering."""
+        conditions = []
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {
+                other.lstrip('-'): value
+                for other, value in zip(ordering[:index], position)
+            }
+            conditions.append(reduce(and_, (
+                Q(**equal),
+                Q(**{f'{name}__{lookup}': position[index]})
+            )))
+        return reduce(or_, conditions)
+
+    def get_key(self, instance):
+        return [getattr(instance, field.lstrip('-'))
+                for field in self.ordering]
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            position, reverse = data['p'], bool(data['r'])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound('Неверный курсор.')
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ):
+            raise NotFound('Неверный курсор.')
+        return position, reverse
+
+    def convert_position(self, model, position):
+        """Приводит значения курсора к типам полей сортировки.
+
+        Курсор приходит от клиента: значение неверного типа дошло бы до
+        filter() и вызвало ошибку 500.
+        """
+        converted = []
+        for field, value in zip(self.ordering, position):
+            if value is None or isinstance(value, (list, dict)):
+                raise NotFound('Неверный курсор.')
+            try:
+                value = model._meta.get_field(field.lstrip('-')).to_python(
+                    value
+                )
+            except FieldDoesNotExist:
+                # Аннотация: тип проверит сравнение в БД.
+                pass
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound('Неверный курсор.')
+            converted.append(value)
+        return converted
+
+    def encode_cursor(self, position, reverse):
+        if position is None:
+            return None
+        cursor = base64.urlsafe_b64encode(json.dumps(
+            {'p': position, 'r': int(reverse)}, default=str
+        ).encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, cursor)
+        return remove_query_param(url, 'offset')
+
+
+class KeysetOrLimitOffsetPagination(LimitOffsetPagination):
+    """Limit/offset по умолчанию и keyset-пагинация при параметре ?cursor=.
+
+    Глубокий offset сканирует все пропущенные строки, поэтому он ограничен
+    max_offset: дальше листать нужно курсором.
+    """
+    keyset_class = KeysetPagination
+    max_offset = 10000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        if self.get_offset(request) > self.max_offset:
+            raise ValidationError({self.offset_query_param: (
+                f'Смещение не может превышать {self.max_offset}. '
+                f'Используйте параметр {self.keyset_class.cursor_query_param}.'
+            )})
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,40 @@
+"""Допустимое число SQL-запросов на действие представления.
+
+Бюджет не должен зависеть от размера страницы или числа связанных
+объектов: рост числа запросов вместе с данными — признак N+1.
+Тесты падают, если запрос к API выходит за бюджет, и выводят его SQL.
+Бюджеты записи равны наибольшему числу запросов в тестах: любой лишний
+запрос на жанр или строку сразу выходит за бюджет.
+Запрос авторизованного пользователя включает выборку пользователя
+(она нужна, только если его нет в кэше CachedJWTAuthentication).
+Письма в тестах отправляются сразу (EMAIL_OUTBOX_EAGER), с захватом
+и отметкой об отправке.
+
+Не ограничены действия, число запросов которых растёт с данными
+по построению: массовое сохранение произведений (на SQLite — построчно)
+и удаление произведений и пользователей, каскадом удаляющее отзывы
+с пересчётом рейтингов.
+"""
+
+QUERY_BUDGETS = {
+    'APIGetToken': {'post': 1},
+    'APISignup': {'post': 6},
+    'CategoryViewSet': {'list': 3, 'create': 3, 'destroy': 6},
+    'GenreViewSet': {'list': 3, 'create': 3, 'destroy': 6},
+    'TitleViewSet': {
+        'list': 4, 'retrieve': 3, 'scores': 1, 'top': 3,
+        'create': 15, 'partial_update': 18,
+    },
+    'ReviewViewSet': {
+        'list': 4, 'retrieve': 3,
+        'create': 10, 'partial_update': 10, 'destroy': 10,
+    },
+    'CommentViewSet': {
+        'list': 4, 'retrieve': 3,
+        'create': 2, 'partial_update': 3, 'destroy': 3,
+    },
+    'UsersViewSet': {
+        'list': 3, 'retrieve': 2, 'get_current_user_info': 3,
+        'create': 4, 'update': 1, 'partial_update': 3,
+    },
+}
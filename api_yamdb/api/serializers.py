@@ -2,9 +2,10 @@ import datetime as dt
 
 from rest_framework.validators import UniqueValidator
 from rest_framework import serializers
-from rest_framework.generics import get_object_or_404
 from rest_framework.exceptions import ValidationError
 from django.core import validators
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 
 from reviews.models import Genre, Category, Title, Review, User, Comment
 from reviews.validators import validate_username
@@ -49,20 +50,46 @@ class SignUpSerializer(serializers.Serializer):
         validators=(validators.MaxLengthValidator(254),)
     )
 
-    def validate(self, data):
-        if User.objects.filter(username=data['username']).exists():
-            user = User.objects.get(username=data['username'])
-            if user.email == data['email']:
-                return data
-            raise ValidationError(
-                f'{data["email"]} не соответствует '
-                f'зарегистрированому на акаунте {user.username}'
-            )
-        if User.objects.filter(email=data['email']).exists():
+    def find_user(self, data):
+        """Ищет пользователя одним запросом по username или email.
+
+        Возвращает пользователя с теми же username и email или None,
+        если ни одно из полей не занято.
+        """
+        users = User.objects.filter(
+            Q(username=data['username']) | Q(email=data['email'])
+        )[:2]
+        for user in users:
+            if user.username == data['username']:
+                if user.email == data['email']:
+                    return user
+                raise ValidationError(
+                    f'{data["email"]} не соответствует '
+                    f'зарегистрированому на акаунте {user.username}'
+                )
+        if users:
             raise ValidationError(f'{data["email"]} уже зарегистрирован, '
                                   'укажите другой email')
+        return None
+
+    def validate(self, data):
+        self.user = self.find_user(data)
         return data
 
+    def create(self, validated_data):
+        if self.user is not None:
+            return self.user
+        try:
+            with transaction.atomic():
+                return User.objects.create(**validated_data)
+        except IntegrityError:
+            # Параллельный запрос занял username или email между
+            # проверкой и вставкой.
+            user = self.find_user(validated_data)
+            if user is None:
+                raise
+            return user
+
     class Meta:
         model = User
         fields = ('email', 'username')
@@ -111,6 +138,38 @@ class TitleSerializer(serializers.ModelSerializer):
         return value
 
 
+class TitleScoresSerializer(serializers.ModelSerializer):
+    count = serializers.IntegerField(source='score_count', read_only=True)
+    scores = serializers.DictField(
+        source='score_distribution', child=serializers.IntegerField(),
+        read_only=True
+    )
+
+    class Meta:
+        model = Title
+        fields = ('id', 'rating', 'count', 'scores')
+
+
+class TopTitlesQuerySerializer(serializers.Serializer):
+    genre = serializers.SlugField(required=False)
+    category = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(
+        required=False, default=10, min_value=1, max_value=100
+    )
+
+
+class TitleBulkSerializer(TitleSerializer):
+    """Элемент массовой загрузки: жанры и категория передаются слагами."""
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(
+        child=serializers.SlugField(), required=False
+    )
+    category = serializers.SlugField(required=False)
+
+    class Meta(TitleSerializer.Meta):
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(read_only=True,
                                           slug_field='username')
@@ -121,9 +180,7 @@ class ReviewSerializer(serializers.ModelSerializer):
     def validate(self, data):
         request = self.context['request']
         author = request.user
-        title = get_object_or_404(
-            Title, id=self.context['view'].kwargs.get('title_id')
-        )
+        title = self.context['title']
         if request.method == 'POST':
             if Review.objects.filter(title=title, author=author).exists():
                 raise ValidationError('Вы не можете добавить более'
@@ -0,0 +1,39 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Genre, Review, Title, User
+from reviews.signals import data_reloaded
+from .authentication import USER_RESOURCE
+from .cache import bump_versions
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, **kwargs):
+    bump_versions('genres', 'titles')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    bump_versions('categories', 'titles')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def title_changed(sender, **kwargs):
+    bump_versions('titles')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    bump_versions(USER_RESOURCE.format(instance.pk))
+
+
+@receiver(data_reloaded)
+def data_reloaded_in_bulk(sender, **kwargs):
+    bump_versions('genres', 'categories', 'titles', 'users')
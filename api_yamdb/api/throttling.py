@@ -0,0 +1,100 @@
+"""Ограничение частоты запросов скользящим окном.
+
+Вместо списка меток времени (SimpleRateThrottle) на каждый ключ хранятся
+два счётчика: текущего и предыдущего окна длиной в период частоты.
+Число запросов за последний период оценивается как счётчик текущего окна
+плюс доля предыдущего, пропорциональная ещё не прошедшей части окна.
+Проверка стоит одного get_many и одного set в кэше.
+
+Чтение и запись счётчика не атомарны: параллельные запросы в разных
+процессах могут прочитать одно значение, и часть их не будет учтена.
+Лимит поэтому мягкий — превышение возможно на число одновременных
+запросов с одного ключа.
+
+Частоты задаются в REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] под ключами
+'<throttle_scope представления>.ip' и '<throttle_scope>.username'.
+"""
+import hashlib
+import math
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    cache = cache
+    scope_suffix = None
+
+    def __init__(self):
+        # Частота зависит от представления и читается в allow_request.
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        if not self.scope:
+            return True
+        self.scope = f'{self.scope}.{self.scope_suffix}'
+        # Частоты читаются при каждом запросе, а не при импорте,
+        # как в SimpleRateThrottle: так работает override_settings.
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, offset = divmod(self.now, self.duration)
+        current_key = f'{self.key}_{int(window)}'
+        previous_key = f'{self.key}_{int(window) - 1}'
+        counts = self.cache.get_many((current_key, previous_key))
+        self.current = counts.get(current_key, 0)
+        self.previous = counts.get(previous_key, 0)
+        self.elapsed = offset / self.duration
+        if (self.current + self.previous * (1 - self.elapsed)
+                >= self.num_requests):
+            return self.throttle_failure()
+
+        # Окно нужно и в следующем периоде — как предыдущее. Не incr:
+        # у кэшей без своего incr (FileBasedCache) он перезаписывает
+        # ключ со сроком по умолчанию вместо 2 * duration.
+        self.cache.set(current_key, self.current + 1, 2 * self.duration)
+        return True
+
+    def wait(self):
+        """Секунды, через которые оценка опустится ниже лимита."""
+        if self.current >= self.num_requests:
+            # В следующем окне текущее станет предыдущим и начнёт убывать.
+            until = 2 - self.num_requests / self.current
+        else:
+            until = 1 - (self.num_requests - self.current) / self.previous
+        return max(1, math.ceil((until - self.elapsed) * self.duration))
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """Лимит на адрес клиента (с учётом NUM_PROXIES)."""
+    scope_suffix = 'ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)
+        }
+
+
+class UsernameRateThrottle(SlidingWindowThrottle):
+    """Лимит на username из тела запроса, с любых адресов."""
+    scope_suffix = 'username'
+
+    def get_cache_key(self, request, view):
+        data = request.data
+        username = data.get('username') if hasattr(data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return None
+        # Имя приходит от клиента: в ключ кэша идёт его хэш.
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': hashlib.sha1(username.encode()).hexdigest(),
+        }
@@ -1,5 +1,5 @@
-from django.core.mail import EmailMessage
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, filters, permissions, status, mixins
 from rest_framework.decorators import action
@@ -7,20 +7,28 @@ from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
-from django.db.models import Avg
 
-from reviews.models import Genre, Category, Title, User, Review
+from reviews.models import (Genre, Category, Title, User, Review, Comment,
+                            Leaderboard, OutboxEmail)
+from .cache import CachedListMixin, CachedResponseMixin, get_versions
+from .conditional import ConditionalGetMixin, ConditionalListMixin
+from .mixins import (AuthorVersionsMixin, EagerLoadingMixin,
+                     ReviewNestedMixin, TitleNestedMixin)
+from .pagination import KeysetOrLimitOffsetPagination
 from .permissions import (AdminModeratorAuthorPermission, AdminOnly,
                           IsAdminUserOrReadOnly)
+from .throttling import IPRateThrottle, UsernameRateThrottle
 from .serializers import (GenreSerializer, CategorySerializer,
                           TitleSerializer, ReviewSerializer,
                           UsersSerializer, NotAdminSerializer,
                           GetTokenSerializer, SignUpSerializer,
-                          CommentSerializer)
+                          CommentSerializer, TitleScoresSerializer,
+                          TopTitlesQuerySerializer)
 from api.filters import TitleFilter
+from api.bulk import bulk_create_titles, bulk_update_titles
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+class UsersViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UsersSerializer
     permission_classes = (permissions.IsAuthenticated, AdminOnly,)
@@ -58,6 +66,9 @@ class APIGetToken(APIView):
         "confirmation_code": "string"
     }
     """
+    throttle_classes = (IPRateThrottle, UsernameRateThrottle)
+    throttle_scope = 'token'
+
     def post(self, request):
         serializer = GetTokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -88,31 +99,32 @@ class APISignup(APIView):
     }
     """
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (IPRateThrottle, UsernameRateThrottle)
+    throttle_scope = 'signup'
 
     @staticmethod
     def send_email(user):
-        email = EmailMessage(
+        OutboxEmail.objects.enqueue(
             subject='Код подтверждения для доступа к API!',
             body=(
                 f'Доброе время суток, {user.username}.'
                 f'\nКод подтверждения для доступа к API:'
                 f'{user.confirmation_code}'
             ),
-            to=[user.email]
+            to=user.email,
+            coalesce_key='confirmation-code'
         )
-        email.send()
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user, create = User.objects.get_or_create(
-            **serializer.validated_data
-        )
-        self.send_email(user)
+        self.send_email(serializer.save())
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CreateDestroyViewSet(mixins.CreateModelMixin,
+class CreateDestroyViewSet(CachedListMixin,
+                           ConditionalListMixin,
+                           mixins.CreateModelMixin,
                            mixins.DestroyModelMixin,
                            mixins.ListModelMixin,
                            viewsets.GenericViewSet):
@@ -125,19 +137,23 @@ class CreateDestroyViewSet(mixins.CreateModelMixin,
 
 class GenreViewSet(CreateDestroyViewSet):
     queryset = Genre.objects.all()
+    cache_resources = ('genres',)
     serializer_class = GenreSerializer
 
 
 class CategoryViewSet(CreateDestroyViewSet):
     queryset = Category.objects.all()
+    cache_resources = ('categories',)
     serializer_class = CategorySerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+class TitleViewSet(CachedResponseMixin, ConditionalGetMixin,
+                   EagerLoadingMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.all()
+    cache_resources = ('titles',)
     serializer_class = TitleSerializer
     permission_classes = (IsAdminUserOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetOrLimitOffsetPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
 
@@ -148,20 +164,90 @@ class TitleViewSet(viewsets.ModelViewSet):
         genre = Genre.objects.filter(
             slug__in=self.request.data.getlist('genre')
         )
-        serializer.save(category=category, genre=genre)
+        # Одна транзакция: сохранение и смена жанров пересобирают
+        # лидеров произведения один раз.
+        with transaction.atomic():
+            serializer.save(category=category, genre=genre)
 
     def perform_update(self, serializer):
         self.perform_create(serializer)
 
+    def get_related_versions(self, instances):
+        return get_versions('genres', 'categories')
+
+    def get_serializer_class(self):
+        if self.action == 'scores':
+            return TitleScoresSerializer
+        return super().get_serializer_class()
+
+    @action(detail=True, url_path='scores')
+    def scores(self, request, pk=None):
+        """
+        Распределение оценок произведения от 1 до 10. Хранится в строке
+        произведения и обновляется вместе с рейтингом. Права доступа:
+        Доступно без токена.
+        """
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data)
+
+    @action(detail=False, url_path='top')
+    def top(self, request):
+        """
+        Лучшие произведения по рейтингу среди набравших достаточно отзывов.
+        Параметры: genre, category (слаги), limit (до 100). Права доступа:
+        Доступно без токена.
+        """
+        return self.cached_response(self.get_top, request)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_top(self, request):
+        params = TopTitlesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+        entries = Leaderboard.objects.filter(genre__isnull=True)
+        if 'genre' in params:
+            entries = Leaderboard.objects.filter(genre__slug=params['genre'])
+        if 'category' in params:
+            entries = entries.filter(category__slug=params['category'])
+        ids = list(entries.order_by('-rating', 'title_id').values_list(
+            'title_id', flat=True
+        )[:params['limit']])
+        titles = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [titles[pk] for pk in ids if pk in titles], many=True
+        )
+        return Response(serializer.data)
+
+    @action(methods=['POST', 'PATCH'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """
+        Массовое создание (POST) или частичное изменение (PATCH, с id)
+        произведений. Жанры и категория передаются слагами. Права
+        доступа: Администратор. При ошибках ничего не сохраняется, в ответе
+        список ошибок по каждому элементу.
+        """
+        if request.method == 'POST':
+            titles = bulk_create_titles(request.data)
+            response_status = status.HTTP_201_CREATED
+        else:
+            titles = bulk_update_titles(request.data)
+            response_status = status.HTTP_200_OK
+        queryset = self.get_queryset().filter(
+            pk__in=[title.pk for title in titles]
+        ).order_by('pk')
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data, status=response_status)
+
+
+class ReviewViewSet(TitleNestedMixin, AuthorVersionsMixin,
+                    ConditionalGetMixin, EagerLoadingMixin,
+                    viewsets.ModelViewSet):
+    queryset = Review.objects.all()
     serializer_class = ReviewSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetOrLimitOffsetPagination
     permission_classes = (AdminModeratorAuthorPermission,)
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return super().get_queryset().filter(title=self.get_title())
 
     def get_permissions(self):
         if self.action == 'POST':
@@ -169,18 +255,19 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.get_title())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReviewNestedMixin, AuthorVersionsMixin,
+                     ConditionalGetMixin, EagerLoadingMixin,
+                     viewsets.ModelViewSet):
+    queryset = Comment.objects.all()
     serializer_class = CommentSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetOrLimitOffsetPagination
     permission_classes = (AdminModeratorAuthorPermission,)
 
     def get_queryset(self):
-        review = get_object_or_404(Review, id=self.kwargs.get('review_id'))
-        return review.comments.all()
+        return super().get_queryset().filter(review=self.get_review())
 
     def get_permissions(self):
         if self.action == 'POST':
@@ -188,5 +275,4 @@ class CommentViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, id=self.kwargs.get('review_id'))
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
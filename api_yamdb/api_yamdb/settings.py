@@ -34,6 +34,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,6 +76,57 @@ DATABASES = {
 }
 
 
+# Cache
+
+# Файловый кэш общий для всех воркеров gunicorn на одной машине.
+# FileBasedCache перебирает весь каталог при каждой записи (set, add),
+# поэтому каждая запись ответа, счётчика частоты или версии стоит O(N)
+# от числа файлов, а дойдя до MAX_ENTRIES, он удаляет случайную
+# 1/CULL_FREQUENCY записей. Лимиты поэтому небольшие; при большем числе
+# пользователей и ответов нужен Redis или Memcached с тем же алиасом.
+# В default лежат ответы, счётчики частоты запросов и пользователи;
+# версии ресурсов и отозванные токены вытеснять нельзя, поэтому они
+# в отдельном 'state' с запасом по числу записей.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', BASE_DIR / 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+    'state': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_STATE_LOCATION',
+                              BASE_DIR / 'cache_state'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+}
+
+# Кэш версий ресурсов (api.cache) и отозванных токенов.
+API_STATE_CACHE_ALIAS = 'state'
+
+API_CACHE_TIMEOUT = 60 * 15
+
+# Пользователи JWT-запросов: записей в LRU процесса и время жизни
+# в нём и в общем кэше.
+AUTH_USER_CACHE_SIZE = 1024
+
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+
+# Сколько проверенных JWT-токенов держать в LRU процесса.
+AUTH_TOKEN_CACHE_SIZE = 4096
+
+# Сколько отзывов нужно произведению, чтобы попасть в списки лучших.
+LEADERBOARD_MIN_REVIEWS = 3
+
+# Заголовок Server-Timing с временем БД, сериализации и рендеринга.
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'false').lower() == 'true'
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -116,7 +168,7 @@ AUTH_USER_MODEL = 'reviews.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -124,6 +176,13 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
+    # Лимиты api.throttling: '<throttle_scope>.ip' и '<throttle_scope>.username'.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup.ip': '100/hour',
+        'signup.username': '10/hour',
+        'token.ip': '100/hour',
+        'token.username': '10/minute',
+    },
 }
 
 SIMPLE_JWT = {
@@ -131,6 +190,16 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# api.mail.SpoolEmailBackend складывает письма в EMAIL_SPOOL_DIR, команда
+# flush_mail отправляет их пачками через EMAIL_SPOOL_BACKEND.
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend'
+)
+
+EMAIL_SPOOL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+EMAIL_SPOOL_DIR = os.getenv('EMAIL_SPOOL_DIR', BASE_DIR / 'mail_spool')
+
 EMAIL_HOST = 'smtp.gmail.com'
 
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
@@ -143,4 +212,12 @@ EMAIL_USE_TLS = True
 
 EMAIL_USE_SSL = False
 
+# Письма уходят через очередь в БД (команда send_outbox). С EMAIL_OUTBOX_EAGER
+# они отправляются сразу после сохранения — для разработки и тестов.
+EMAIL_OUTBOX_EAGER = (
+    os.getenv('EMAIL_OUTBOX_EAGER', 'false').lower() == 'true'
+)
+
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
 AUTH_USER_MODEL = 'reviews.User'
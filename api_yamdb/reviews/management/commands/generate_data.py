@@ -0,0 +1,212 @@
+import csv
+import os
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+
+from django.core.management import BaseCommand, call_command
+from django.db import connection
+from django.db.models import Max
+
+from reviews.management.csv_data import (DATE_FORMAT, TABLE_BY_NAME,
+                                         get_path)
+from reviews.management.csv_native import NATIVE_VENDORS
+from reviews.models import SCORES
+
+WORDS = (
+    'фильм', 'книга', 'сюжет', 'герой', 'финал', 'автор', 'музыка', 'сцена',
+    'диалог', 'актёр', 'история', 'мир', 'время', 'жизнь', 'любовь',
+    'отличный', 'скучный', 'сильный', 'странный', 'живой', 'новый',
+    'старый', 'красивый', 'смешной', 'грустный', 'очень', 'совсем', 'снова',
+    'рекомендую', 'пересмотрю', 'не', 'понравился', 'удивил', 'затянут',
+)
+# Даты отсчитываются от постоянного момента, чтобы данные зависели
+# только от seed.
+EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+PERIOD = timedelta(days=3 * 365)
+
+
+def zipf_counts(total, buckets, skew, cap):
+    """Раскладывает total по buckets с весами 1 / rank ** skew.
+
+    Ни в одну корзину не попадает больше cap.
+    """
+    if not buckets or not cap:
+        return [0] * buckets
+    total = min(total, buckets * cap)
+    weights = [1 / rank ** skew for rank in range(1, buckets + 1)]
+    scale = total / sum(weights)
+    counts = [min(cap, int(weight * scale)) for weight in weights]
+    missing = total - sum(counts)
+    while missing:
+        for index in range(buckets):
+            if counts[index] < cap:
+                counts[index] += 1
+                missing -= 1
+                if not missing:
+                    break
+    return counts
+
+
+class Generator:
+    """Пишет синтетические данные в csv-файлы формата load_csv."""
+
+    def __init__(self, directory, options, start_ids):
+        self.directory = directory
+        self.options = options
+        self.start = start_ids
+        self.rng = random.Random(options['seed'])
+
+    def text(self, low, high):
+        words = self.rng.choices(WORDS, k=self.rng.randint(low, high))
+        return ' '.join(words)
+
+    def moment(self):
+        return (EPOCH - PERIOD * self.rng.random()).strftime(DATE_FORMAT)
+
+    def write(self, name, rows):
+        table = TABLE_BY_NAME[name]
+        total = 0
+        with open(get_path(self.directory, table), 'w', encoding='utf-8',
+                  newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(table.columns)
+            for row in rows:
+                writer.writerow(row)
+                total += 1
+        return total
+
+    def ids(self, name, count):
+        return range(self.start[name], self.start[name] + count)
+
+    def users(self):
+        for pk in self.ids('users', self.options['users']):
+            yield (pk, f'user{pk}', f'user{pk}@yamdb.fake', 'user',
+                   self.text(0, 8), '', '')
+
+    def slugged(self, name, label):
+        for pk in self.ids(name, self.options[name]):
+            yield pk, f'{label} {pk}', f'{name}-{pk}'
+
+    def titles(self):
+        categories = self.ids('category', self.options['category'])
+        for pk in self.ids('titles', self.options['titles']):
+            yield (pk, self.text(1, 4).capitalize(),
+                   self.rng.randint(1900, EPOCH.year),
+                   self.rng.choice(categories) if categories else '')
+
+    def genre_title(self):
+        genres = self.ids('genre', self.options['genre'])
+        most = min(self.options['genres_per_title'], len(genres))
+        pk = self.start['genre_title']
+        for title_id in self.ids('titles', self.options['titles']):
+            for genre_id in self.rng.sample(genres,
+                                            self.rng.randint(0, most)):
+                yield pk, title_id, genre_id
+                pk += 1
+
+    def reviews(self):
+        users = self.ids('users', self.options['users'])
+        titles = self.ids('titles', self.options['titles'])
+        counts = zipf_counts(self.options['reviews'], len(titles),
+                             self.options['skew'], len(users))
+        # Популярные произведения не должны идти подряд с первого id.
+        self.rng.shuffle(counts)
+        pk = self.start['review']
+        for title_id, count in zip(titles, counts):
+            quality = self.rng.uniform(3, 9)
+            for author in self.rng.sample(users, count):
+                score = round(self.rng.gauss(quality, 1.5))
+                yield (pk, title_id, self.text(3, 20), author,
+                       min(max(score, SCORES[0]), SCORES[-1]), self.moment())
+                pk += 1
+        self.review_count = pk - self.start['review']
+
+    def comments(self):
+        users = self.ids('users', self.options['users'])
+        if not self.review_count or not users:
+            return
+        power = 1 + self.options['skew']
+        for pk in self.ids('comments', self.options['comments']):
+            # Степенное распределение: к немногим отзывам — много ответов.
+            index = int(self.review_count * self.rng.random() ** power)
+            yield (pk, self.start['review'] + index, self.text(2, 15),
+                   self.rng.choice(users), self.moment())
+
+    def run(self):
+        yield 'users', self.users()
+        yield 'category', self.slugged('category', 'Категория')
+        yield 'genre', self.slugged('genre', 'Жанр')
+        yield 'titles', self.titles()
+        yield 'genre_title', self.genre_title()
+        yield 'review', self.reviews()
+        yield 'comments', self.comments()
+
+
+class Command(BaseCommand):
+    help = ('Генерирует большой синтетический набор данных с перекосом '
+            'популярности произведений и загружает его через load_csv.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Зерно генератора случайных чисел.')
+        for name, default in (('users', 1000), ('category', 10),
+                              ('genre', 30), ('titles', 1000),
+                              ('reviews', 10000), ('comments', 10000)):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько строк создать в таблице {name}.'
+            )
+        parser.add_argument(
+            '--genres-per-title', type=int, default=3,
+            help='Наибольшее число жанров у произведения.'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help=('Показатель закона Ципфа для числа отзывов на '
+                  'произведение: чем больше, тем сильнее перекос.')
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--path',
+            help=('Каталог для csv-файлов; по умолчанию временный, '
+                  'удаляется после загрузки.')
+        )
+        parser.add_argument(
+            '--no-load', action='store_true',
+            help='Только записать csv-файлы в --path, не загружая их.'
+        )
+
+    def handle(self, *args, **options):
+        directory = options['path'] or tempfile.mkdtemp(prefix='yamdb-')
+        os.makedirs(directory, exist_ok=True)
+        try:
+            self.generate(directory, options)
+            if not options['no_load']:
+                call_command(
+                    'load_csv', path=directory,
+                    batch_size=options['batch_size'],
+                    fast=connection.vendor in NATIVE_VENDORS,
+                    stdout=self.stdout
+                )
+        finally:
+            if not options['path']:
+                shutil.rmtree(directory)
+
+    def generate(self, directory, options):
+        # Новые id продолжают уже занятые, чтобы можно было дополнять БД.
+        start_ids = {
+            name: (table.model.objects.aggregate(Max('pk'))['pk__max']
+                   or 0) + 1
+            for name, table in TABLE_BY_NAME.items()
+        }
+        generator = Generator(directory, options, start_ids)
+        for name, rows in generator.run():
+            started = perf_counter()
+            total = generator.write(name, rows)
+            self.stdout.write(
+                f'{name}: создано {total} строк за '
+                f'{perf_counter() - started:.2f} с'
+            )
@@ -1,72 +1,169 @@
-from csv import DictReader
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from time import perf_counter
 
-from django.core.management import BaseCommand
+import django
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection, transaction
 
-from reviews.models import (Comment, Review, Category, Genre,
-                            Title, GenreTitle, User)
+from reviews.management.csv_data import (DEFAULT_PATH, TABLES, batched,
+                                         dependency_levels, insert_rows,
+                                         open_table, parse_file, read_rows,
+                                         upsert_rows)
+from reviews.management.csv_native import (NATIVE_VENDORS, native_load,
+                                           reset_sequences, tuned_for_load)
+from reviews.models import Leaderboard, Title
+from reviews.search import get_search_backend
+from reviews.signals import data_reloaded
 
 
 class Command(BaseCommand):
+    help = ('Загружает данные из csv-файлов в пустую БД: пачками через '
+            'bulk_create, по транзакции на таблицу. С --upsert '
+            'синхронизирует заполненную БД с файлами.')
 
-    def handle(self, *args, **kwargs):
-        for row in DictReader(
-            open('./static/data/users.csv', encoding='utf-8')
-        ):
-            user = User(
-                id=row['id'], username=row['username'],
-                email=row['email'], role=row['role'],
-                bio=row['bio'], first_name=row['first_name'],
-                last_name=row['last_name']
-            )
-            user.save()
-        for row in DictReader(
-            open('./static/data/category.csv', encoding='utf-8')
-        ):
-            category = Category(
-                id=row['id'], name=row['name'], slug=row['slug']
-            )
-            category.save()
-        for row in DictReader(
-            open('./static/data/genre.csv', encoding='utf-8')
-        ):
-            genre = Genre(id=row['id'], name=row['name'], slug=row['slug'])
-            genre.save()
-        for row in DictReader(
-            open('./static/data/titles.csv', encoding='utf-8')
-        ):
-            title = Title(
-                id=row['id'], name=row['name'],
-                year=row['year'], category_id=row['category']
-            )
-            title.save()
-        for row in DictReader(
-            open('./static/data/review.csv', encoding='utf-8')
-        ):
-            review = Review(
-                id=row['id'], title_id=row['title_id'],
-                text=row['text'], author_id=row['author'],
-                score=row['score'],
-                pub_date=datetime.strptime(row['pub_date'],
-                                           '%Y-%m-%dT%H:%M:%S.%fZ')
-            )
-            review.save()
-        for row in DictReader(
-            open('./static/data/comments.csv', encoding='utf-8')
-        ):
-            comment = Comment(
-                id=row['id'], review_id=row['review_id'],
-                text=row['text'], author_id=row['author'],
-                pub_date=datetime.strptime(row['pub_date'],
-                                           '%Y-%m-%dT%H:%M:%S.%fZ')
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк вставлять одним запросом.'
+        )
+        parser.add_argument(
+            '--path', default=DEFAULT_PATH,
+            help='Каталог с csv-файлами.'
+        )
+        parser.add_argument(
+            '--jobs', type=int, default=1,
+            help=('Сколько файлов разбирать параллельно. Независимые '
+                  'таблицы вставляются одновременно, если СУБД это '
+                  'позволяет (не SQLite). Файлы тогда читаются в память '
+                  'целиком.')
+        )
+        parser.add_argument(
+            '--fast', action='store_true',
+            help=('Вставлять строки средствами СУБД в обход моделей: '
+                  'executemany в SQLite, COPY в PostgreSQL.')
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help=('Вставлять только новые и обновлять изменившиеся строки, '
+                  'сравнивая их контрольные суммы с сохранёнными.')
+        )
+        parser.add_argument(
+            '--delete-missing', action='store_true',
+            help='Вместе с --upsert удалять строки, которых нет в файлах.'
+        )
+
+    def check_options(self, options):
+        if options['delete_missing'] and not options['upsert']:
+            raise CommandError('--delete-missing работает только с --upsert.')
+        if options['fast']:
+            if options['upsert'] or options['jobs'] > 1:
+                raise CommandError('--fast несовместим с --upsert и --jobs.')
+            if connection.vendor not in NATIVE_VENDORS:
+                raise CommandError(
+                    f'--fast не поддерживается для {connection.vendor}.'
+                )
+
+    def handle(self, *args, **options):
+        self.check_options(options)
+        self.options = options
+        self.touched_titles = set()
+        jobs = options['jobs']
+        if options['fast']:
+            with tuned_for_load(connection):
+                for table in TABLES:
+                    self.load_table(table)
+        elif jobs > 1:
+            with ProcessPoolExecutor(jobs, initializer=django.setup) as pool:
+                parsed = {
+                    table.name: pool.submit(
+                        parse_file, options['path'], table.name,
+                        options['upsert']
+                    )
+                    for table in TABLES
+                }
+                for level in dependency_levels():
+                    self.load_level(level, parsed, jobs)
+        else:
+            for table in TABLES:
+                self.load_table(table)
+        reset_sequences(connection, [table.model for table in TABLES])
+        # Загрузка обходит сигналы: рейтинги и поиск пересчитываются здесь.
+        if options['upsert']:
+            self.refresh_titles(self.touched_titles)
+            return
+        call_command('recompute_ratings', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+
+    def refresh_titles(self, title_ids):
+        """Пересчитывает рейтинги, лидеров и поиск задетых произведений."""
+        backend = get_search_backend()
+        for batch in batched(sorted(title_ids), self.options['batch_size']):
+            with transaction.atomic():
+                titles = list(Title.objects.filter(pk__in=batch))
+                Title.objects.recompute_scores(batch)
+                Leaderboard.objects.refresh(batch)
+                backend.index_many(titles)
+                for title_id in set(batch) - {title.pk for title in titles}:
+                    backend.remove(title_id)
+        data_reloaded.send(sender=self.__class__)
+        self.stdout.write(f'Пересчитано произведений: {len(title_ids)}')
+
+    def load_level(self, level, parsed, jobs):
+        if connection.vendor == 'sqlite' or len(level) == 1:
+            # В SQLite одновременно пишет только одно соединение.
+            for table in level:
+                self.load_table(table, parsed[table.name].result())
+            return
+        with ThreadPoolExecutor(min(jobs, len(level))) as threads:
+            list(threads.map(
+                lambda table: self.load_in_thread(
+                    table, parsed[table.name].result()
+                ),
+                level
+            ))
+
+    def load_in_thread(self, table, rows):
+        try:
+            self.load_table(table, rows)
+        finally:
+            connection.close()
+
+    def load_table(self, table, rows=None):
+        started = perf_counter()
+        with transaction.atomic():
+            if rows is not None:
+                counts = self.save_rows(table, rows)
+            else:
+                with open_table(self.options['path'], table) as file:
+                    if self.options['fast']:
+                        counts = native_load(table, file, connection,
+                                             self.options['batch_size'])
+                    else:
+                        counts = self.save_rows(
+                            table,
+                            read_rows(file, table, self.options['upsert'])
+                        )
+        self.report(table, counts, perf_counter() - started)
+
+    def save_rows(self, table, rows):
+        if self.options['upsert']:
+            *counts, title_ids = upsert_rows(
+                table, rows, self.options['batch_size'],
+                self.options['delete_missing']
             )
-            comment.save()
-        for row in DictReader(
-            open('./static/data/genre_title.csv', encoding='utf-8')
-        ):
-            genretitle = GenreTitle(
-                id=row['id'], genre_id=row['genre_id'],
-                title_id=row['title_id'],
+            self.touched_titles.update(title_ids)
+            return counts
+        return insert_rows(table, rows, self.options['batch_size'])
 
+    def report(self, table, counts, elapsed):
+        if self.options['upsert']:
+            inserted, updated, deleted = counts
+            self.stdout.write(
+                f'{table.name}: добавлено {inserted}, обновлено {updated}, '
+                f'удалено {deleted} за {elapsed:.2f} с'
             )
-            genretitle.save()
+            return
+        self.stdout.write(
+            f'{table.name}: {counts} строк за {elapsed:.2f} с '
+            f'({counts / max(elapsed, 1e-6):.0f} строк/с)'
+        )
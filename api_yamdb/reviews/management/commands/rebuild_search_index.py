@@ -0,0 +1,15 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from reviews.search import get_search_backend
+from reviews.signals import data_reloaded
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс произведений.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = get_search_backend().rebuild()
+        data_reloaded.send(sender=self.__class__)
+        self.stdout.write(f'Проиндексировано произведений: {total}')
@@ -0,0 +1,34 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from reviews.models import Leaderboard, Title
+from reviews.signals import data_reloaded
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинги, распределения оценок и списки лучших '
+            'произведений по таблице отзывов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько произведений пересчитывать в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = 0
+        total = 0
+        while True:
+            ids = list(
+                Title.objects.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                total += Title.objects.recompute_scores(ids)
+                Leaderboard.objects.refresh(ids)
+            last_id = ids[-1]
+        data_reloaded.send(sender=self.__class__)
+        self.stdout.write(f'Пересчитано произведений: {total}')
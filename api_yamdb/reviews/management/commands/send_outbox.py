@@ -0,0 +1,48 @@
+from time import sleep
+
+from django.core.management import BaseCommand
+
+from reviews.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди: пачками, в несколько потоков, '
+            'с повторами и растущей задержкой после ошибок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько писем захватывать за раз.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Сколько писем отправлять одновременно.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=0,
+            help=('Работать постоянно, проверяя очередь с этим интервалом '
+                  '(в секундах). По умолчанию — отправить готовые письма '
+                  'и завершиться.')
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = failed = 0
+            while True:
+                emails = OutboxEmail.objects.claim(
+                    OutboxEmail.objects.due(options['batch_size'])
+                )
+                if not emails:
+                    break
+                batch_sent = OutboxEmail.objects.deliver(
+                    emails, options['concurrency']
+                )
+                sent += batch_sent
+                failed += len(emails) - batch_sent
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, с ошибкой: {failed}'
+                )
+            if not options['poll_interval']:
+                break
+            sleep(options['poll_interval'])
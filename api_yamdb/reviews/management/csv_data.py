@@ -0,0 +1,284 @@
+import gzip
+import hashlib
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+from csv import DictReader
+from datetime import datetime
+from itertools import islice
+
+from django.db import models
+from django.utils import timezone
+
+from reviews.models import (Category, Comment, CsvRowChecksum, Genre,
+                            GenreTitle, Review, Title, User)
+
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+DEFAULT_PATH = './static/data'
+
+# name — имя csv-файла, columns — столбец csv: поле модели.
+Table = namedtuple('Table', 'name model columns')
+
+TABLES = (
+    Table('users', User, {
+        'id': 'id', 'username': 'username', 'email': 'email',
+        'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+        'last_name': 'last_name',
+    }),
+    Table('category', Category, {'id': 'id', 'name': 'name', 'slug': 'slug'}),
+    Table('genre', Genre, {'id': 'id', 'name': 'name', 'slug': 'slug'}),
+    Table('titles', Title, {
+        'id': 'id', 'name': 'name', 'year': 'year', 'category': 'category',
+    }),
+    Table('review', Review, {
+        'id': 'id', 'title_id': 'title', 'text': 'text', 'author': 'author',
+        'score': 'score', 'pub_date': 'pub_date',
+    }),
+    Table('comments', Comment, {
+        'id': 'id', 'review_id': 'review', 'text': 'text',
+        'author': 'author', 'pub_date': 'pub_date',
+    }),
+    Table('genre_title', GenreTitle, {
+        'id': 'id', 'title_id': 'title', 'genre_id': 'genre',
+    }),
+)
+
+TABLE_BY_NAME = {table.name: table for table in TABLES}
+
+# Столбцы, по которым строка таблицы задевает рейтинг, жанры или имя
+# произведения: после --upsert пересчитываются только эти произведения.
+TITLE_COLUMNS = {'titles': 'id', 'review': 'title_id',
+                 'genre_title': 'title_id'}
+
+
+def dependency_levels(tables=TABLES):
+    """Группы таблиц в порядке загрузки по внешним ключам моделей.
+
+    Таблицы одной группы зависят только от предыдущих групп и могут
+    загружаться одновременно.
+    """
+    by_model = {table.model: table.name for table in tables}
+    depends = {
+        table.name: {
+            by_model[field.related_model]
+            for field in table.model._meta.concrete_fields
+            if field.is_relation and field.related_model in by_model
+            and field.related_model is not table.model
+        }
+        for table in tables
+    }
+    levels, done = [], set()
+    while len(done) < len(tables):
+        level = [table for table in tables
+                 if table.name not in done and depends[table.name] <= done]
+        if not level:
+            raise ValueError('Циклическая зависимость между таблицами.')
+        levels.append(level)
+        done.update(table.name for table in level)
+    return levels
+
+
+def get_path(directory, table):
+    return f'{directory}/{table.name}.csv'
+
+
+def open_table(directory, table):
+    """Открывает файл таблицы на чтение; подходит и сжатый .csv.gz."""
+    path = get_path(directory, table)
+    if not os.path.exists(path) and os.path.exists(f'{path}.gz'):
+        return gzip.open(f'{path}.gz', 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def to_python(field, value):
+    if value == '' and field.null:
+        return None
+    if isinstance(field, (models.DateTimeField, models.TimeField)):
+        return datetime.strptime(value, DATE_FORMAT)
+    return field.to_python(value)
+
+
+def to_csv(field, value, day=None):
+    """Обратное to_python: значение поля -> строка csv.
+
+    TimeField хранит только время, в файл оно пишется с датой day.
+    """
+    if value is None:
+        return ''
+    if isinstance(field, models.TimeField):
+        value = datetime.combine(day, value)
+    if isinstance(value, datetime):
+        return value.strftime(DATE_FORMAT)
+    return str(value)
+
+
+def parse_row(table, row):
+    """Строка csv -> именованные аргументы модели (attname: значение)."""
+    result = {}
+    for column, name in table.columns.items():
+        field = table.model._meta.get_field(name)
+        result[field.attname] = to_python(field, row[column])
+    return result
+
+
+def row_checksum(table, row):
+    raw = '\x1f'.join(row[column] for column in table.columns)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def read_rows(file, table, checksums=False):
+    """Строки файла; с checksums — пары (контрольная сумма, строка)."""
+    for row in DictReader(file):
+        if checksums:
+            yield row_checksum(table, row), parse_row(table, row)
+        else:
+            yield parse_row(table, row)
+
+
+def parse_file(directory, name, checksums=False):
+    """Разбирает файл целиком; вызывается в пуле процессов."""
+    table = TABLE_BY_NAME[name]
+    with open_table(directory, table) as file:
+        return list(read_rows(file, table, checksums))
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def file_dates(table):
+    """Не даёт auto_now_add заменить текущим временем даты из файла."""
+    fields = [
+        field for field in (
+            table.model._meta.get_field(name)
+            for name in table.columns.values()
+        )
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def insert_rows(table, rows, batch_size):
+    """Вставляет строки пачками через bulk_create, возвращает их число."""
+    total = 0
+    with file_dates(table):
+        for batch in batched(rows, batch_size):
+            table.model.objects.bulk_create(
+                [table.model(**row) for row in batch]
+            )
+            total += len(batch)
+    return total
+
+
+def upsert_rows(table, rows, batch_size, delete_missing=False):
+    """Синхронизирует таблицу с файлом по контрольным суммам строк.
+
+    Вставляет новые строки, обновляет изменившиеся и, с delete_missing,
+    удаляет отсутствующие в файле. Строки без сохранённой суммы
+    (загруженные без --upsert) считаются изменившимися. Суммы и id
+    запрашиваются по пачкам; в памяти целиком держатся только id файла
+    и только с delete_missing.
+    Возвращает (вставлено, обновлено, удалено, id задетых произведений).
+    """
+    model = table.model
+    title_column = TITLE_COLUMNS.get(table.name)
+    fields = [model._meta.get_field(name).name
+              for name in table.columns.values() if name != 'id']
+    touched = [field.name for field in model._meta.concrete_fields
+               if getattr(field, 'auto_now', False)]
+    seen = set()
+    titles = set()
+    inserted = updated = 0
+    for batch in batched(rows, batch_size):
+        ids = [row['id'] for _, row in batch]
+        if delete_missing:
+            seen.update(ids)
+        stored = dict(CsvRowChecksum.objects.filter(
+            table=table.name, row_id__in=ids
+        ).values_list('row_id', 'checksum'))
+        existing = dict(model.objects.filter(pk__in=ids).values_list(
+            'pk', title_column or 'pk'
+        ))
+        new, changed, checksums = [], [], []
+        for checksum, row in batch:
+            pk = row['id']
+            if pk in existing and stored.get(pk) == checksum:
+                continue
+            (changed if pk in existing else new).append(model(**row))
+            checksums.append(CsvRowChecksum(
+                table=table.name, row_id=pk, checksum=checksum
+            ))
+            if title_column:
+                # Для перенесённой строки задеты оба произведения.
+                titles.add(row[title_column])
+                titles.add(existing.get(pk, row[title_column]))
+        with file_dates(table):
+            model.objects.bulk_create(new)
+        if changed:
+            # bulk_update не трогает auto_now-поля сам.
+            now = timezone.now()
+            for obj in changed:
+                for name in touched:
+                    setattr(obj, name, now)
+            model.objects.bulk_update(changed, fields + touched)
+        CsvRowChecksum.objects.filter(table=table.name, row_id__in=[
+            obj.row_id for obj in checksums if obj.row_id in stored
+        ]).delete()
+        CsvRowChecksum.objects.bulk_create(checksums)
+        inserted += len(new)
+        updated += len(changed)
+    deleted = 0
+    if delete_missing:
+        deleted = delete_missing_rows(table, seen, batch_size, titles)
+    return inserted, updated, deleted, titles
+
+
+def keyset_batches(queryset, key, columns, batch_size):
+    """Значения columns пачками по возрастанию key, без OFFSET."""
+    last = None
+    while True:
+        page = queryset.order_by(key)
+        if last is not None:
+            page = page.filter(**{f'{key}__gt': last})
+        rows = list(page.values_list(key, *columns)[:batch_size])
+        if not rows:
+            return
+        last = rows[-1][0]
+        yield rows
+
+
+def delete_missing_rows(table, seen, batch_size, titles):
+    """Удаляет строки и суммы, id которых нет в seen; обходит БД пачками."""
+    model = table.model
+    title_column = TITLE_COLUMNS.get(table.name, 'pk')
+    deleted = 0
+    for rows in keyset_batches(model.objects.all(), 'pk', [title_column],
+                               batch_size):
+        missing = [(pk, title_id) for pk, title_id in rows
+                   if pk not in seen]
+        if not missing:
+            continue
+        if table.name in TITLE_COLUMNS:
+            titles.update(title_id for _, title_id in missing)
+        _, per_model = model.objects.filter(
+            pk__in=[pk for pk, _ in missing]
+        ).delete()
+        deleted += per_model.get(model._meta.label, 0)
+    checksums = CsvRowChecksum.objects.filter(table=table.name)
+    for rows in keyset_batches(checksums, 'row_id', [], batch_size):
+        checksums.filter(row_id__in=[
+            row_id for row_id, in rows if row_id not in seen
+        ]).delete()
+    return deleted
@@ -0,0 +1,150 @@
+"""Загрузка csv в обход ORM: без создания экземпляров моделей.
+
+SQLite получает строки через executemany, PostgreSQL — через
+COPY FROM STDIN во временную таблицу и INSERT ... SELECT с приведением
+типов. Столбцы, которых нет в файле, заполняются значениями по умолчанию
+полей модели, auto_now-поля — текущим временем.
+"""
+import csv
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import models
+from django.utils import timezone
+
+from reviews.management.csv_data import batched, to_python
+
+NATIVE_VENDORS = ('sqlite', 'postgresql')
+
+SQLITE_PRAGMAS = {
+    'synchronous': 'OFF',
+    'cache_size': '-262144',
+    'temp_store': 'MEMORY',
+}
+
+
+def column_plan(table, connection):
+    """Столбцы таблицы БД и для каждого — столбец csv или готовое значение."""
+    now = timezone.now()
+    csv_fields = {
+        table.model._meta.get_field(name): column
+        for column, name in table.columns.items()
+    }
+    plan = []
+    for field in table.model._meta.concrete_fields:
+        if field in csv_fields:
+            plan.append((field, csv_fields[field], None))
+            continue
+        if (getattr(field, 'auto_now', False)
+                or getattr(field, 'auto_now_add', False)):
+            value = now
+        else:
+            value = field.get_default()
+        plan.append(
+            (field, None, field.get_db_prep_save(value, connection))
+        )
+    return plan
+
+
+@contextmanager
+def tuned_for_load(connection):
+    """Ослабляет надёжность записи SQLite на время загрузки в пустую БД."""
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        saved = {}
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name}')
+            saved[name] = cursor.fetchone()[0]
+            cursor.execute(f'PRAGMA {name} = {value}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for name, value in saved.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def load_sqlite(table, file, connection, batch_size):
+    plan = column_plan(table, connection)
+    qn = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        qn(table.model._meta.db_table),
+        ', '.join(qn(field.column) for field, _, _ in plan),
+        ', '.join(['%s'] * len(plan))
+    )
+
+    def params(row):
+        return [
+            value if column is None else field.get_db_prep_save(
+                to_python(field, row[column]), connection
+            )
+            for field, column, value in plan
+        ]
+
+    total = 0
+    with connection.cursor() as cursor:
+        for batch in batched(map(params, csv.DictReader(file)), batch_size):
+            cursor.executemany(sql, batch)
+            total += len(batch)
+    return total
+
+
+def cast(field, column, connection):
+    value = f"NULLIF({column}, '')" if field.null else column
+    if isinstance(field, models.TimeField):
+        # В файлах время записано вместе с датой.
+        return f'{value}::timestamptz::time'
+    return f'{value}::{field.cast_db_type(connection)}'
+
+
+def load_postgres(table, file, connection):
+    qn = connection.ops.quote_name
+    header = next(csv.reader([file.readline()]))
+    staging = qn(f'csv_{table.name}')
+    selects, params = [], []
+    for field, column, value in column_plan(table, connection):
+        if column is None:
+            selects.append('%s')
+            params.append(value)
+        else:
+            selects.append(cast(field, qn(column), connection))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {staging} '
+            f'({", ".join(f"{qn(column)} text" for column in header)}) '
+            'ON COMMIT DROP'
+        )
+        cursor.copy_expert(
+            f'COPY {staging} FROM STDIN WITH (FORMAT csv)', file
+        )
+        cursor.execute(
+            'INSERT INTO {} ({}) SELECT {} FROM {}'.format(
+                qn(table.model._meta.db_table),
+                ', '.join(
+                    qn(field.column) for field in
+                    table.model._meta.concrete_fields
+                ),
+                ', '.join(selects), staging
+            ),
+            params
+        )
+        return cursor.rowcount
+
+
+def native_load(table, file, connection, batch_size):
+    """Вставляет строки файла, возвращает их число.
+
+    Должна вызываться внутри транзакции.
+    """
+    if connection.vendor == 'postgresql':
+        return load_postgres(table, file, connection)
+    return load_sqlite(table, file, connection, batch_size)
+
+
+def reset_sequences(connection, model_list):
+    """Сдвигает счётчики первичных ключей за загруженные явно id."""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), model_list):
+            cursor.execute(sql)
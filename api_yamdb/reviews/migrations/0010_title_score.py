@@ -0,0 +1,43 @@
+# Generated by Django 3.2 on 2026-10-18 18:58
+
+from django.db import migrations, models
+
+
+def fill_title_scores(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    stats = Review.objects.values('title_id').annotate(
+        total=models.Sum('score'), count=models.Count('id')
+    )
+    for row in stats:
+        Title.objects.filter(pk=row['title_id']).update(
+            score_sum=row['total'],
+            score_count=row['count'],
+            rating=row['total'] / row['count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_alter_user_managers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_title_scores, migrations.RunPython.noop),
+    ]
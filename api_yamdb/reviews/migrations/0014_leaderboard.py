@@ -0,0 +1,58 @@
+# Generated by Django 3.2 on 2026-10-18 19:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_leaderboard(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    Leaderboard = apps.get_model('reviews', 'Leaderboard')
+    titles = Title.objects.filter(
+        score_count__gte=settings.LEADERBOARD_MIN_REVIEWS
+    )
+    for title in titles:
+        genre_ids = GenreTitle.objects.filter(
+            title_id=title.pk
+        ).values_list('genre_id', flat=True)
+        Leaderboard.objects.bulk_create([
+            Leaderboard(title_id=title.pk, genre_id=genre_id,
+                        category_id=title.category_id, rating=title.rating,
+                        score_count=title.score_count)
+            for genre_id in (None, *genre_ids)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_title_score_distribution'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Leaderboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField(verbose_name='Рейтинг')),
+                ('score_count', models.PositiveIntegerField(verbose_name='Количество оценок')),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leaderboard', to='reviews.category')),
+                ('genre', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='reviews.genre')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard', to='reviews.title')),
+            ],
+            options={
+                'verbose_name': 'Позиция в списке лучших',
+                'verbose_name_plural': 'Списки лучших',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['genre', '-rating', 'title'], name='leaderboard_genre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['genre', 'category', '-rating', 'title'], name='leaderboard_category_idx'),
+        ),
+        migrations.RunPython(fill_leaderboard, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_leaderboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CsvRowChecksum',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=32, verbose_name='Таблица')),
+                ('row_id', models.BigIntegerField(verbose_name='Идентификатор строки')),
+                ('checksum', models.CharField(max_length=40, verbose_name='Контрольная сумма')),
+            ],
+            options={
+                'verbose_name': 'Контрольная сумма строки csv',
+                'verbose_name_plural': 'Контрольные суммы строк csv',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='csvrowchecksum',
+            constraint=models.UniqueConstraint(fields=('table', 'row_id'), name='unique_csv_row'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2 on 2026-10-18 19:43
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def drop_duplicates(apps, schema_editor):
+    Leaderboard = apps.get_model('reviews', 'Leaderboard')
+    keep = Leaderboard.objects.values('title', 'genre').annotate(
+        keep=Min('id')
+    ).values('keep')
+    Leaderboard.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0016_outbox_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='leaderboard',
+            constraint=models.UniqueConstraint(fields=('title', 'genre'), name='unique_leaderboard_genre'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboard',
+            constraint=models.UniqueConstraint(condition=models.Q(genre=None), fields=('title',), name='unique_leaderboard_title'),
+        ),
+    ]
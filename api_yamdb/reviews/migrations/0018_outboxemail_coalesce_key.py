@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0017_leaderboard_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxemail',
+            name='coalesce_key',
+            field=models.CharField(blank=True, max_length=64, verbose_name='Ключ объединения'),
+        ),
+    ]
@@ -1,6 +1,14 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser, UserManager
+from django.core.mail import EmailMessage
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
 
 from .validators import validate_username
 
@@ -15,6 +23,8 @@ ROLE_CHOICES = [
     (MODERATOR, MODERATOR),
 ]
 
+SCORES = range(1, 11)
+
 
 class UserManager(models.Manager):
     def create(self, **kwargs):
@@ -102,6 +112,7 @@ class User(AbstractUser):
         null=True,
         default='XXXX'
     )
+    updated_at = models.DateTimeField('дата изменения', auto_now=True)
 
     objects = CreateUserManager()
 
@@ -130,6 +141,7 @@ class Genre(models.Model):
     name = models.CharField('Название жанра', max_length=256)
     slug = models.SlugField('Сокращенное название жанра',
                             unique=True, max_length=50)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         ordering = ('name',)
@@ -141,6 +153,7 @@ class Category(models.Model):
     name = models.CharField('Название категории', max_length=256)
     slug = models.SlugField('Сокращенное название категории',
                             unique=True, max_length=50)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         ordering = ('name',)
@@ -148,6 +161,48 @@ class Category(models.Model):
         verbose_name_plural = 'Категории'
 
 
+class TitleManager(models.Manager):
+    def add_score(self, title_id, score, count=1):
+        """Учитывает оценку в рейтинге (count=-1 снимает её) одним UPDATE."""
+        score_sum = models.F('score_sum') + score * count
+        score_count = models.F('score_count') + count
+        bucket = f'score_{score}'
+        return self.filter(pk=title_id).update(
+            score_sum=score_sum,
+            score_count=score_count,
+            rating=(Cast(score_sum, models.FloatField())
+                    / NullIf(score_count, 0)),
+            updated_at=timezone.now(),
+            **{bucket: models.F(bucket) + count},
+        )
+
+    def recompute_scores(self, title_ids):
+        """Пересчитывает рейтинг и распределение оценок по отзывам."""
+        stats = {}
+        for row in Review.objects.filter(
+            title_id__in=title_ids
+        ).values('title_id', 'score').annotate(count=models.Count('id')):
+            stats.setdefault(row['title_id'], {})[row['score']] = row['count']
+        titles = list(self.filter(pk__in=title_ids))
+        now = timezone.now()
+        for title in titles:
+            histogram = stats.get(title.pk, {})
+            for score in SCORES:
+                setattr(title, f'score_{score}', histogram.get(score, 0))
+            title.score_sum = sum(
+                score * count for score, count in histogram.items()
+            )
+            title.score_count = sum(histogram.values())
+            title.rating = (title.score_sum / title.score_count
+                            if title.score_count else None)
+            title.updated_at = now
+        self.bulk_update(titles, (
+            'score_sum', 'score_count', 'rating', 'updated_at',
+            *(f'score_{score}' for score in SCORES)
+        ))
+        return len(titles)
+
+
 class Title(models.Model):
     name = models.CharField('Название произведения', max_length=256)
     year = models.IntegerField('Год выхода')
@@ -157,11 +212,47 @@ class Title(models.Model):
     category = models.ForeignKey(
         Category, on_delete=models.SET_NULL,
         blank=True, null=True, related_name='titles')
+    score_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+    score_count = models.PositiveIntegerField('Количество оценок', default=0)
+    rating = models.FloatField('Рейтинг', null=True, blank=True)
+    score_1 = models.PositiveIntegerField('Оценок «1»', default=0)
+    score_2 = models.PositiveIntegerField('Оценок «2»', default=0)
+    score_3 = models.PositiveIntegerField('Оценок «3»', default=0)
+    score_4 = models.PositiveIntegerField('Оценок «4»', default=0)
+    score_5 = models.PositiveIntegerField('Оценок «5»', default=0)
+    score_6 = models.PositiveIntegerField('Оценок «6»', default=0)
+    score_7 = models.PositiveIntegerField('Оценок «7»', default=0)
+    score_8 = models.PositiveIntegerField('Оценок «8»', default=0)
+    score_9 = models.PositiveIntegerField('Оценок «9»', default=0)
+    score_10 = models.PositiveIntegerField('Оценок «10»', default=0)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = TitleManager()
+
+    # Счётчики оценок меняют только UPDATE с F-выражениями (add_score)
+    # и пересчёт (recompute_scores), а не save() копии из памяти.
+    SCORE_FIELDS = frozenset((
+        'score_sum', 'score_count', 'rating',
+        *(f'score_{score}' for score in SCORES)
+    ))
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.SCORE_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def score_distribution(self):
+        return {score: getattr(self, f'score_{score}') for score in SCORES}
+
 
 class GenreTitle(models.Model):
     genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
@@ -179,6 +270,17 @@ class Review(models.Model):
                     MinValueValidator(1, 'Оценка  может быть от 1 до 10')]
     )
     pub_date = models.TimeField('Дата отзыва', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Оценка на момент загрузки нужна, чтобы при сохранении
+        # скорректировать рейтинг произведения на разницу.
+        instance._score_snapshot = None
+        if 'title_id' in field_names and 'score' in field_names:
+            instance._score_snapshot = (instance.title_id, instance.score)
+        return instance
 
     def __str__(self):
         return self.text[:15]
@@ -200,6 +302,7 @@ class Comment(models.Model):
     review = models.ForeignKey(Review, on_delete=models.CASCADE,
                                related_name='comments')
     pub_date = models.TimeField('Дата комментария', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     def __str__(self):
         return self.text[:15]
@@ -207,3 +310,232 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Коментарий'
         verbose_name_plural = 'Коментарии'
+
+
+class LeaderboardManager(models.Manager):
+    def refresh(self, title_ids):
+        """Пересобирает строки лидеров для произведений.
+
+        В таблицу попадают только произведения, набравшие
+        LEADERBOARD_MIN_REVIEWS отзывов: строка без жанра — для общего
+        списка, и по строке на каждый жанр.
+        """
+        title_ids = sorted(set(title_ids))
+        with transaction.atomic():
+            if connection.features.has_select_for_update:
+                # Блокировка строк произведений (по порядку id, без
+                # взаимных блокировок) не даёт двум пересборкам вставить
+                # строки одновременно. SQLite пишет по одной транзакции.
+                list(Title.objects.select_for_update().filter(
+                    pk__in=title_ids
+                ).order_by('pk').values_list('pk', flat=True))
+            self.filter(title_id__in=title_ids).delete()
+            self._fill(title_ids)
+
+    def _fill(self, title_ids):
+        titles = Title.objects.filter(
+            pk__in=title_ids,
+            score_count__gte=settings.LEADERBOARD_MIN_REVIEWS
+        ).values_list('pk', 'category_id', 'rating', 'score_count')
+        genres = {}
+        for title_id, genre_id in GenreTitle.objects.filter(
+            title_id__in=title_ids
+        ).values_list('title_id', 'genre_id'):
+            genres.setdefault(title_id, []).append(genre_id)
+        self.bulk_create([
+            Leaderboard(title_id=title_id, genre_id=genre_id,
+                        category_id=category_id, rating=rating,
+                        score_count=score_count)
+            for title_id, category_id, rating, score_count in titles
+            for genre_id in (None, *genres.get(title_id, ()))
+        ])
+
+
+class Leaderboard(models.Model):
+    """Материализованный список лучших произведений по жанрам и категориям.
+
+    Поддерживается сигналами при изменении рейтинга, жанров и категории
+    произведения, топ читается по индексу без агрегации.
+    """
+    title = models.ForeignKey(Title, on_delete=models.CASCADE,
+                              related_name='leaderboard')
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE,
+                              null=True, related_name='leaderboard')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL,
+                                 null=True, related_name='leaderboard')
+    rating = models.FloatField('Рейтинг')
+    score_count = models.PositiveIntegerField('Количество оценок')
+
+    objects = LeaderboardManager()
+
+    class Meta:
+        verbose_name = 'Позиция в списке лучших'
+        verbose_name_plural = 'Списки лучших'
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'genre'],
+                                    name='unique_leaderboard_genre'),
+            # NULL в уникальном индексе не совпадает с NULL.
+            models.UniqueConstraint(fields=['title'],
+                                    condition=models.Q(genre=None),
+                                    name='unique_leaderboard_title'),
+        ]
+        indexes = [
+            models.Index(fields=['genre', '-rating', 'title'],
+                         name='leaderboard_genre_idx'),
+            models.Index(fields=['genre', 'category', '-rating', 'title'],
+                         name='leaderboard_category_idx'),
+        ]
+
+
+class CsvRowChecksum(models.Model):
+    """Контрольная сумма строки csv-файла, загруженной `load_csv --upsert`.
+
+    По ней повторная загрузка отличает неизменившиеся строки от новых
+    и обновлённых.
+    """
+    table = models.CharField('Таблица', max_length=32)
+    row_id = models.BigIntegerField('Идентификатор строки')
+    checksum = models.CharField('Контрольная сумма', max_length=40)
+
+    class Meta:
+        verbose_name = 'Контрольная сумма строки csv'
+        verbose_name_plural = 'Контрольные суммы строк csv'
+        constraints = [
+            models.UniqueConstraint(fields=['table', 'row_id'],
+                                    name='unique_csv_row')
+        ]
+
+
+class OutboxEmailManager(models.Manager):
+    def enqueue(self, subject, body, to, coalesce_key=''):
+        """Ставит письмо в очередь; отправит его команда send_outbox.
+
+        Из писем с одним coalesce_key на один адрес, скопившихся
+        в каталоге SpoolEmailBackend, flush_mail отправит последнее.
+        С настройкой EMAIL_OUTBOX_EAGER письмо отправляется сразу после
+        фиксации транзакции (для тестов и разработки).
+        """
+        email = self.create(subject=subject, body=body, to=to,
+                            coalesce_key=coalesce_key)
+        if getattr(settings, 'EMAIL_OUTBOX_EAGER', False):
+            transaction.on_commit(
+                lambda: self.deliver(self.claim([email]))
+            )
+        return email
+
+    def due(self, limit):
+        return list(self.filter(
+            status=OutboxEmail.PENDING, next_attempt_at__lte=timezone.now()
+        ).order_by('next_attempt_at')[:limit])
+
+    def claim(self, emails, lease=timedelta(minutes=5)):
+        """Захватывает письма на время отправки.
+
+        Попытка засчитывается сразу, а следующая назначается через lease:
+        другие обработчики письмо не возьмут, а если этот упадёт,
+        оно уйдёт повторно. Возвращает захваченные письма.
+        """
+        claimed = []
+        next_attempt_at = timezone.now() + lease
+        for email in emails:
+            if self.filter(
+                pk=email.pk, status=OutboxEmail.PENDING,
+                next_attempt_at=email.next_attempt_at
+            ).update(attempts=models.F('attempts') + 1,
+                     next_attempt_at=next_attempt_at):
+                email.attempts += 1
+                email.next_attempt_at = next_attempt_at
+                claimed.append(email)
+        return claimed
+
+    def deliver(self, emails, concurrency=1):
+        """Отправляет захваченные письма не более чем в concurrency потоков.
+
+        Неудачная отправка откладывается с экспоненциальной задержкой,
+        после EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо помечается
+        неотправленным. Возвращает число отправленных писем.
+        """
+        def send(email):
+            try:
+                email.to_message().send()
+            except Exception as error:
+                return error
+            return None
+
+        with ThreadPoolExecutor(max(1, concurrency)) as pool:
+            errors = list(pool.map(send, emails))
+        sent = 0
+        for email, error in zip(emails, errors):
+            if error is None:
+                email.status, email.sent_at = OutboxEmail.SENT, timezone.now()
+                sent += 1
+            else:
+                email.last_error = repr(error)
+                if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                    email.status = OutboxEmail.FAILED
+                else:
+                    email.next_attempt_at = timezone.now() + backoff(
+                        email.attempts
+                    )
+            email.save(update_fields=[
+                'status', 'sent_at', 'last_error', 'next_attempt_at'
+            ])
+        return sent
+
+
+def backoff(attempts):
+    """Задержка перед следующей попыткой: 30 с, 1 мин, 2 мин... до часа.
+
+    Случайная добавка разводит повторы писем, упавших одновременно.
+    """
+    delay = min(30 * 2 ** (attempts - 1), 3600)
+    return timedelta(seconds=delay * random.uniform(1, 1.2))
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку (outbox).
+
+    Запрос только сохраняет письмо, отправляет его команда send_outbox
+    с повторами при ошибках SMTP.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'ожидает отправки'),
+        (SENT, 'отправлено'),
+        (FAILED, 'не отправлено'),
+    ]
+    # Заголовок с coalesce_key: по нему flush_mail объединяет письма.
+    COALESCE_HEADER = 'X-YaMDb-Coalesce'
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    to = models.EmailField('Получатель', max_length=254)
+    coalesce_key = models.CharField('Ключ объединения', max_length=64,
+                                    blank=True)
+    status = models.CharField('Статус', max_length=10,
+                              choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt_at = models.DateTimeField('Следующая попытка',
+                                           default=timezone.now)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    sent_at = models.DateTimeField('Дата отправки', null=True, blank=True)
+
+    objects = OutboxEmailManager()
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'],
+                         name='outbox_due_idx'),
+        ]
+
+    def to_message(self):
+        headers = {}
+        if self.coalesce_key:
+            headers[self.COALESCE_HEADER] = self.coalesce_key
+        return EmailMessage(subject=self.subject, body=self.body,
+                            to=[self.to], headers=headers)
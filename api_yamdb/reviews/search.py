@@ -0,0 +1,152 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Title
+
+FTS_TABLE = 'reviews_title_fts'
+
+
+class LikeSearchBackend:
+    """Поиск подстрокой: запасной вариант без индекса."""
+
+    def search(self, queryset, value, rank=False):
+        return queryset.filter(name__icontains=value)
+
+    def index(self, title):
+        pass
+
+    def index_many(self, titles):
+        pass
+
+    def remove(self, title_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class SqliteSearchBackend(LikeSearchBackend):
+    """Полнотекстовый поиск по таблице FTS5 с префиксным совпадением слов.
+
+    Таблица заводится миграцией 0011 и обновляется сигналами Title;
+    после массовой загрузки её нужно перестроить командой
+    rebuild_search_index.
+    """
+
+    @staticmethod
+    def build_query(value):
+        words = re.findall(r'\w+', value)
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def search(self, queryset, value, rank=False):
+        query = self.build_query(value)
+        if not query:
+            return super().search(queryset, value, rank)
+        queryset = queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (query,)
+        ))
+        if rank:
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f'SELECT rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'AND rowid = {Title._meta.db_table}.id',
+                (query,)
+            )).order_by('search_rank', 'id')
+        return queryset
+
+    def index(self, title):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (title.pk,)
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name) VALUES (%s, %s)',
+                (title.pk, title.name)
+            )
+
+    def index_many(self, titles):
+        if not titles:
+            return
+        ids = [title.pk for title in titles]
+        with connection.cursor() as cursor:
+            # Пачками: у SQLite ограничено число параметров запроса.
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                cursor.execute(
+                    f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+                    f'({", ".join(["%s"] * len(chunk))})', chunk
+                )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, name) VALUES (%s, %s)',
+                [(title.pk, title.name) for title in titles]
+            )
+
+    def remove(self, title_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (title_id,)
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name) '
+                f'SELECT id, name FROM {Title._meta.db_table}'
+            )
+            return cursor.rowcount
+
+
+class PostgresSearchBackend(LikeSearchBackend):
+    """ILIKE по GIN-индексу pg_trgm с ранжированием по триграммам.
+
+    Индекс поддерживается самой СУБД, синхронизация не нужна. name__icontains
+    здесь не подходит: Django сравнивает UPPER("name"), и индекс по
+    самому столбцу не используется.
+    """
+
+    def search(self, queryset, value, rank=False):
+        pattern = re.sub(r'([\\%_])', r'\\\1', value)
+        queryset = queryset.filter(RawSQL(
+            f'{connection.ops.quote_name(Title._meta.db_table)}.'
+            f'{connection.ops.quote_name("name")} ILIKE %s',
+            (f'%{pattern}%',), output_field=BooleanField()
+        ))
+        if rank:
+            from django.contrib.postgres.search import TrigramSimilarity
+            queryset = queryset.annotate(
+                search_rank=TrigramSimilarity('name', value)
+            ).order_by('-search_rank', 'id')
+        return queryset
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute('REINDEX INDEX reviews_title_name_trgm')
+        return Title.objects.count()
+
+
+def fts_available():
+    with connection.cursor() as cursor:
+        return FTS_TABLE in connection.introspection.table_names(cursor)
+
+
+@lru_cache(maxsize=None)
+def _get_backend(vendor):
+    path = getattr(settings, 'TITLE_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if vendor == 'sqlite' and fts_available():
+        return SqliteSearchBackend()
+    if vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return LikeSearchBackend()
+
+
+def get_search_backend():
+    return _get_backend(connection.vendor)
@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .models import Category, Genre, Leaderboard, Review, Title
+from .search import get_search_backend
+
+# Отправляется после массовых операций в обход сигналов моделей.
+data_reloaded = Signal()
+
+
+def refresh_leaderboard(*title_ids):
+    """Пересобирает лидеров после фиксации, один раз на транзакцию.
+
+    После фиксации: при каскадном удалении произведения его строки
+    не должны вернуться в таблицу лидеров. id копятся в соединении,
+    а каждый вызов ставит в on_commit flush_leaderboard: первый из них
+    забирает все накопленные id, остальные находят набор пустым. Флаг
+    «уже поставлено» не подходит: после отката точки сохранения его
+    вызов снимается, а флаг остался бы.
+    """
+    connection = transaction.get_connection()
+    pending = getattr(connection, 'leaderboard_title_ids', None)
+    if pending is None:
+        pending = connection.leaderboard_title_ids = set()
+    pending.update(title_ids)
+    transaction.on_commit(flush_leaderboard)
+
+
+def flush_leaderboard():
+    connection = transaction.get_connection()
+    title_ids = getattr(connection, 'leaderboard_title_ids', None)
+    connection.leaderboard_title_ids = None
+    if title_ids:
+        Leaderboard.objects.refresh(title_ids)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    snapshot = getattr(instance, '_score_snapshot', None)
+    if created:
+        Title.objects.add_score(instance.title_id, instance.score)
+    elif snapshot is None:
+        Title.objects.recompute_scores([instance.title_id])
+    elif snapshot != (instance.title_id, instance.score):
+        Title.objects.add_score(*snapshot, count=-1)
+        Title.objects.add_score(instance.title_id, instance.score)
+    if snapshot is not None:
+        refresh_leaderboard(instance.title_id, snapshot[0])
+    else:
+        refresh_leaderboard(instance.title_id)
+    instance._score_snapshot = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    title_id, score = (getattr(instance, '_score_snapshot', None)
+                       or (instance.title_id, instance.score))
+    Title.objects.add_score(title_id, score, count=-1)
+    refresh_leaderboard(title_id)
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'name' in update_fields:
+        get_search_backend().index(instance)
+    if update_fields is None or 'category' in update_fields:
+        refresh_leaderboard(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        refresh_leaderboard(instance.pk)
+    elif pk_set:
+        refresh_leaderboard(*pk_set)
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def touch_titles(sender, instance, **kwargs):
+    # Каскад обходит save(), а вывод произведений меняется.
+    lookup = 'category' if sender is Category else 'genre'
+    Title.objects.filter(**{lookup: instance}).update(
+        updated_at=timezone.now()
+    )
@@ -0,0 +1,78 @@
+import pytest
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.urls import Resolver404, resolve
+
+from api.query_budgets import QUERY_BUDGETS
+
+
+def get_action(environ):
+    """Имя представления и действие, которые обработают запрос."""
+    try:
+        match = resolve(environ['PATH_INFO'])
+    except Resolver404:
+        return None, None
+    view = getattr(match.func, 'cls', None)
+    if view is None:
+        return None, None
+    method = environ['REQUEST_METHOD'].lower()
+    actions = getattr(match.func, 'actions', None)
+    return view.__name__, actions.get(method) if actions else method
+
+
+class QueryLog:
+    """Обёртка execute_wrapper, запоминающая выполненный SQL.
+
+    В отличие от CaptureQueriesContext не зависит от журнала запросов,
+    который Django очищает в начале каждого запроса.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql if many or not params else f'{sql} {params}')
+        return execute(sql, params, many, context)
+
+
+@pytest.fixture(autouse=True)
+def query_budget():
+    """Проверяет, что запросы к API укладываются в QUERY_BUDGETS."""
+    state = {}
+
+    def started(sender, environ, **kwargs):
+        view, action = get_action(environ)
+        budget = QUERY_BUDGETS.get(view, {}).get(action)
+        if budget is None:
+            return
+        log = QueryLog()
+        wrapper = connection.execute_wrapper(log)
+        wrapper.__enter__()
+        state.update(log=log, wrapper=wrapper, budget=budget,
+                     name=f'{view}.{action}', path=environ['PATH_INFO'])
+
+    def finished(sender, **kwargs):
+        if 'wrapper' not in state:
+            return
+        state.pop('wrapper').__exit__(None, None, None)
+        queries = state.pop('log').queries
+        if len(queries) > state['budget']:
+            sql = '\n'.join(
+                f'{number}. {query}'
+                for number, query in enumerate(queries, 1)
+            )
+            pytest.fail(
+                f'{state["name"]} ({state["path"]}) выполнил '
+                f'{len(queries)} SQL-запросов при бюджете '
+                f'{state["budget"]}:\n{sql}',
+                pytrace=False
+            )
+
+    request_started.connect(started)
+    request_finished.connect(finished)
+    yield
+    request_started.disconnect(started)
+    request_finished.disconnect(finished)
+    if 'wrapper' in state:
+        # Запрос упал до request_finished.
+        state['wrapper'].__exit__(None, None, None)
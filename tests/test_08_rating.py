@@ -0,0 +1,124 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json()['rating']
+
+    def test_01_rating_follows_reviews(self, admin_client, user_client,
+                                       moderator_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'text', 2)
+        response = create_single_review(moderator_client, title_id, 'text', 8)
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Рейтинг произведения должен пересчитываться при создании '
+            'отзыва.'
+        )
+
+        review_id = response.json()['id']
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/',
+            data={'score': 4}
+        )
+        assert self.get_rating(admin_client, title_id) == 3, (
+            'Рейтинг произведения должен пересчитываться при изменении '
+            'оценки в отзыве.'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{title_id}/reviews/{review_id}/')
+        assert self.get_rating(admin_client, title_id) == 2, (
+            'Рейтинг произведения должен пересчитываться при удалении '
+            'отзыва.'
+        )
+
+        user.delete()
+        assert self.get_rating(admin_client, title_id) is None, (
+            'Рейтинг произведения должен пересчитываться при каскадном '
+            'удалении отзывов.'
+        )
+
+    def test_02_recompute_command(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'text', 7)
+        Title.objects.filter(pk=title_id).update(
+            score_sum=0, score_count=0, rating=None
+        )
+        call_command('recompute_ratings', chunk_size=1)
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_sum, title.score_count, title.rating) == (
+            7, 1, 7
+        ), 'Команда `recompute_ratings` должна восстанавливать рейтинг.'
+
+    def test_03_score_distribution(self, client, admin_client, user_client,
+                                   moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'text', 3)
+        response = create_single_review(moderator_client, title_id, 'text', 9)
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{response.json()["id"]}/',
+            data={'score': 3}
+        )
+        url = f'/api/v1/titles/{title_id}/scores/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{url}` должен быть доступен без токена.'
+        )
+        data = response.json()
+        expected = {str(score): 0 for score in range(1, 11)}
+        expected['3'] = 2
+        assert data['scores'] == expected and data['count'] == 2, (
+            f'Проверьте, что `{url}` возвращает распределение оценок '
+            'с учётом изменённых отзывов.'
+        )
+
+        Title.objects.filter(pk=title_id).update(score_3=0)
+        call_command('recompute_ratings')
+        assert client.get(url).json()['scores'] == expected, (
+            'Команда `recompute_ratings` должна восстанавливать '
+            'распределение оценок.'
+        )
+
+    def test_04_stale_title_save(self, admin_client, user_client):
+        titles, categories, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        stale = Title.objects.get(pk=title_id)
+        create_single_review(user_client, title_id, 'text', 8)
+        stale.name = 'Новое название'
+        stale.save()
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_sum, title.score_count, title.rating,
+                title.score_8, title.name) == (
+            8, 1, 8, 1, 'Новое название'
+        ), (
+            'Сохранение произведения, загруженного до нового отзыва, '
+            'не должно затирать счётчики оценок.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(
+                f'/api/v1/titles/{title_id}/',
+                data={'name': 'Ещё название',
+                      'category': categories[0]['slug']}
+            )
+        assert response.status_code == HTTPStatus.OK
+        updates = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE "reviews_title"')]
+        assert updates and not any('"score_sum"' in sql for sql in updates), (
+            'Изменение произведения через API не должно записывать '
+            'счётчики оценок.'
+        )
@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_reviews, create_titles
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryCount:
+
+    def check_constant(self, client, url):
+        single = count_queries(client, f'{url}?limit=1')
+        full = count_queries(client, f'{url}?limit=10')
+        assert single == full, (
+            f'Проверьте, что количество SQL-запросов к `{url}` не зависит '
+            f'от размера страницы: {single} для одного объекта и {full} '
+            'для всей страницы.'
+        )
+
+    def test_01_titles(self, client, admin_client):
+        create_titles(admin_client)
+        self.check_constant(client, '/api/v1/titles/')
+
+    def test_02_reviews_and_comments(self, client, admin_client, admin,
+                                     user_client, user, moderator_client,
+                                     moderator):
+        authors_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, authors_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        self.check_constant(client, url)
+        self.check_constant(client, f'{url}{reviews[0]["id"]}/comments/')
+
+    def test_03_parent_resolved_once(self, admin_client, admin, user_client):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            user_client.post(url, data={'text': 'text', 'score': 5})
+        lookups = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('SELECT')
+                   and 'FROM "reviews_title"' in query['sql']
+                   and '"reviews_title"."id" = ' in query['sql']]
+        assert len(lookups) == 1, (
+            f'Проверьте, что POST-запрос к `{url}` находит произведение '
+            f'одним запросом, а не {len(lookups)}.'
+        )
+
+        url = (f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        assert admin_client.get(url).status_code == 404, (
+            'Комментарии отзыва, запрошенные через чужое произведение, '
+            'должны возвращать ответ со статусом 404.'
+        )
@@ -0,0 +1,61 @@
+import base64
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10KeysetPagination:
+    url = '/api/v1/titles/'
+
+    def test_01_cursor_walk(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        expected = sorted(title['id'] for title in titles)
+
+        response = client.get(f'{self.url}?cursor=&limit=1')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            'Keyset-пагинация не должна считать количество объектов.'
+        )
+        assert data['previous'] is None
+        seen = [item['id'] for item in data['results']]
+        while data['next']:
+            data = client.get(data['next']).json()
+            seen += [item['id'] for item in data['results']]
+        assert seen == expected, (
+            f'Проверьте, что переход по ссылкам `next` в `{self.url}` '
+            'проходит все объекты по порядку ровно один раз.'
+        )
+
+        data = client.get(data['previous']).json()
+        assert [item['id'] for item in data['results']] == expected[:-1], (
+            f'Проверьте, что ссылка `previous` в `{self.url}` возвращает '
+            'предыдущую страницу.'
+        )
+
+    def test_02_invalid_cursor_and_deep_offset(self, client):
+        response = client.get(f'{self.url}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        for position in (['abc'], [[1]], [None], [{}]):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps({'p': position, 'r': 0}).encode()
+            ).decode()
+            response = client.get(f'{self.url}?cursor={cursor}')
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Курсор с позицией {position} должен отклоняться '
+                'ответом 404, а не ошибкой сервера.'
+            )
+        response = client.get(f'{self.url}?offset=1000000')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Слишком глубокий offset должен отклоняться с предложением '
+            'использовать курсор.'
+        )
+
+    def test_03_limit_offset_still_works(self, client, admin_client):
+        create_titles(admin_client)
+        data = client.get(f'{self.url}?limit=1&offset=1').json()
+        assert data['count'] == 2 and len(data['results']) == 1
@@ -0,0 +1,60 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from reviews.models import Title
+from reviews.search import get_search_backend
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearch:
+    url = '/api/v1/titles/'
+
+    def names(self, client, query):
+        response = client.get(f'{self.url}?{query}')
+        assert response.status_code == 200
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_prefix_search(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.names(client, 'name=терм') == ['Терминатор'], (
+            'Фильтр `name` должен находить произведения по началу слова '
+            'без учёта регистра.'
+        )
+        assert self.names(client, 'search=креп ореш') == ['Крепкий орешек']
+        assert self.names(client, 'search=квай') == []
+
+    def test_02_index_follows_changes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        title.name = 'Чужой'
+        title.save()
+        assert self.names(client, 'name=чужой') == ['Чужой']
+        assert self.names(client, 'name=терминатор') == []
+        title.delete()
+        assert self.names(client, 'name=чужой') == []
+
+    def test_03_rebuild_after_bulk_load(self, client):
+        Title.objects.bulk_create([Title(name='Солярис', year=1972)])
+        assert self.names(client, 'name=солярис') == []
+        call_command('rebuild_search_index')
+        assert self.names(client, 'name=солярис') == ['Солярис'], (
+            'Команда `rebuild_search_index` должна индексировать '
+            'произведения, загруженные в обход сигналов.'
+        )
+
+    def test_04_postgres_plan_uses_index(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('Триграммный индекс есть только в PostgreSQL.')
+        queryset = get_search_backend().search(Title.objects.all(), 'орешек')
+        with connection.cursor() as cursor:
+            # На пустой таблице планировщик и так выбрал бы seq scan.
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                plan = queryset.explain()
+            finally:
+                cursor.execute('RESET enable_seqscan')
+        assert 'reviews_title_name_trgm' in plan, (
+            'Поиск в PostgreSQL должен использовать GIN-индекс по name.'
+        )
@@ -0,0 +1,68 @@
+import pickle
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import VERSION_KEY, bump_versions, get_state_cache, get_versions
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ResponseCache:
+
+    def test_01_anonymous_reads_are_cached(self, client, admin_client):
+        create_titles(admin_client)
+        for url in ('/api/v1/titles/', '/api/v1/genres/',
+                    '/api/v1/categories/'):
+            first = client.get(url)
+            with CaptureQueriesContext(connection) as context:
+                second = client.get(url)
+            assert second.json() == first.json()
+            assert not context.captured_queries, (
+                f'Повторный анонимный GET-запрос к `{url}` должен '
+                'обслуживаться из кэша без запросов к БД.'
+            )
+
+    def test_02_writes_invalidate_cache(self, client, admin_client,
+                                        user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] is None
+        create_single_review(user_client, titles[0]['id'], 'text', 6)
+        assert client.get(url).json()['rating'] == 6, (
+            'Новый отзыв должен сбрасывать закэшированный рейтинг.'
+        )
+
+        admin_client.post('/api/v1/genres/', data={
+            'name': 'Вестерн', 'slug': 'western'
+        })
+        slugs = [genre['slug'] for genre in
+                 client.get('/api/v1/genres/').json()['results']]
+        assert 'western' in slugs, (
+            'Создание жанра должно сбрасывать кэш списка жанров.'
+        )
+
+    def test_03_file_cache_versions_never_expire(self, settings, tmp_path):
+        settings.CACHES = {
+            **settings.CACHES,
+            'state': {
+                'BACKEND': (
+                    'django.core.cache.backends.filebased.FileBasedCache'
+                ),
+                'LOCATION': str(tmp_path),
+            },
+        }
+        cache = get_state_cache()
+        first, = get_versions('titles')
+        with transaction.atomic():
+            bump_versions('titles')
+        second, = get_versions('titles')
+        assert second == first + 1
+        with open(cache._key_to_file(VERSION_KEY.format('titles')),
+                  'rb') as file:
+            assert pickle.load(file) is None, (
+                'Версия ресурса в FileBasedCache не должна получать срок '
+                'жизни после повышения.'
+            )
@@ -0,0 +1,120 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import (create_comments, create_reviews,
+                         create_single_review)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ConditionalGet:
+
+    def check_not_modified(self, client, url, last_modified=False):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response.get('ETag')
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `ETag`.'
+        )
+        assert response.has_header('Last-Modified') == last_modified, (
+            'Заголовок `Last-Modified` должен быть только у ответов без '
+            f'связанных строк и не у списков: проверьте `{url}`.'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'GET-запрос к `{url}` с актуальным `If-None-Match` должен '
+            'возвращать ответ со статусом 304.'
+        )
+        if last_modified:
+            response = client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+            assert response.status_code == HTTPStatus.NOT_MODIFIED
+        return etag
+
+    def test_01_routes(self, admin_client, admin):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        for url in ('/api/v1/titles/', '/api/v1/genres/',
+                    '/api/v1/categories/', '/api/v1/users/', title_url,
+                    f'{title_url}reviews/', review_url,
+                    f'{review_url}comments/'):
+            self.check_not_modified(admin_client, url)
+        self.check_not_modified(
+            admin_client, f'/api/v1/users/{admin.username}/',
+            last_modified=True
+        )
+
+    def test_02_changes_reset_etag(self, admin_client, admin, user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client}
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        title_etag = self.check_not_modified(admin_client, title_url)
+        list_url = f'{title_url}reviews/'
+        list_etag = self.check_not_modified(admin_client, list_url)
+
+        create_single_review(user_client, titles[0]['id'], 'text', 1)
+        for url, etag in ((title_url, title_etag), (list_url, list_etag)):
+            response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'После нового отзыва ETag ответа `{url}` должен '
+                'измениться.'
+            )
+
+    def test_03_no_extra_aggregate(self, admin_client, admin):
+        create_reviews(admin_client, {admin: admin_client})
+        for url in ('/api/v1/titles/', '/api/v1/titles/?cursor=',
+                    '/api/v1/genres/'):
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert response.get('ETag')
+            sql = ' '.join(query['sql'] for query in context.captured_queries)
+            assert 'MAX(' not in sql, (
+                f'ETag списка `{url}` должен строиться по строкам страницы, '
+                'без отдельного агрегатного запроса.'
+            )
+            if 'cursor' in url:
+                assert 'COUNT(' not in sql, (
+                    'Страница по курсору не должна считать строки.'
+                )
+
+    def test_04_delete_and_related_changes(self, admin_client, admin,
+                                           user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client}
+        )
+        list_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = create_single_review(
+            user_client, titles[0]['id'], 'newest', 5
+        )
+        newest_url = f'{list_url}{response.json()["id"]}/'
+        etag = self.check_not_modified(admin_client, list_url)
+        admin_client.delete(newest_url)
+        response = admin_client.get(list_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'После удаления отзыва список отзывов не должен отвечать 304.'
+        )
+
+        etag = self.check_not_modified(admin_client, list_url)
+        review_etag = self.check_not_modified(
+            admin_client, f'{list_url}{reviews[0]["id"]}/'
+        )
+        admin_client.patch('/api/v1/users/me/',
+                           data={'username': 'renamed_admin'})
+        for url, old_etag in ((list_url, etag),
+                              (f'{list_url}{reviews[0]["id"]}/',
+                               review_etag)):
+            response = admin_client.get(url, HTTP_IF_NONE_MATCH=old_etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'После смены username автора ETag `{url}` должен '
+                'измениться.'
+            )
+        assert response.json()['author'] == 'renamed_admin'
@@ -0,0 +1,120 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import bulk
+from reviews.models import Title
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14BulkTitles:
+    url = '/api/v1/titles/bulk/'
+
+    def test_01_bulk_create_and_update(self, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = [
+            {
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [genres[0]['slug'], genres[idx % 3]['slug']],
+                'category': categories[idx % 2]['slug'],
+            }
+            for idx in range(5)
+        ]
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Если POST-запрос администратора к `{self.url}` содержит '
+            'корректные данные - должен вернуться ответ со статусом 201.'
+        )
+        created = response.json()
+        assert [title['name'] for title in created] == [
+            item['name'] for item in data
+        ]
+        assert {genre['slug'] for genre in created[1]['genre']} == {
+            genres[0]['slug'], genres[1]['slug']
+        }
+        assert created[1]['category'] == categories[1]
+
+        patch = [{'id': created[0]['id'], 'year': 1990,
+                  'genre': [genres[2]['slug']]}]
+        response = admin_client.patch(self.url, data=patch, format='json')
+        assert response.status_code == HTTPStatus.OK
+        title = response.json()[0]
+        assert title['year'] == 1990 and title['genre'] == [genres[2]], (
+            f'PATCH-запрос к `{self.url}` должен обновлять переданные поля '
+            'и жанры произведений.'
+        )
+
+    def test_02_per_item_errors(self, admin_client, user_client):
+        categories = create_categories(admin_client)
+        data = [
+            {'name': 'Верное', 'year': 2000,
+             'category': categories[0]['slug']},
+            {'name': 'Неверное', 'year': 2000, 'category': 'missing'},
+        ]
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert errors[0] == {} and 'category' in errors[1], (
+            f'При ошибках в POST-запросе к `{self.url}` ответ должен '
+            'содержать ошибки для каждого элемента списка.'
+        )
+        assert not Title.objects.exists(), (
+            'При ошибке хотя бы в одном элементе ничего не должно '
+            'сохраняться.'
+        )
+
+        response = user_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_03_constant_statements(self, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+
+        def post(count):
+            data = [{'name': f'Пачка {idx}', 'year': 2000,
+                     'genre': [genres[idx % 3]['slug']],
+                     'category': categories[0]['slug']}
+                    for idx in range(count)]
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.post(self.url, data=data,
+                                             format='json')
+            assert response.status_code == HTTPStatus.CREATED
+            return len(context.captured_queries)
+
+        post(10)
+        # Вставка идёт пачками по ограничению числа параметров SQLite.
+        assert post(100) <= 20, (
+            f'POST-запрос к `{self.url}` не должен выполнять запросы '
+            'к БД для каждого произведения.'
+        )
+        assert Title.objects.filter(name='Пачка 99').exists()
+        response = admin_client.get('/api/v1/titles/?name=пачка&limit=200')
+        assert response.json()['count'] == 110, (
+            'Произведения, созданные пачкой, должны попадать в поиск.'
+        )
+
+    def test_04_single_transaction(self, monkeypatch, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+
+        class BrokenIndex:
+            def index_many(self, titles):
+                raise RuntimeError('search index is down')
+
+        monkeypatch.setattr(bulk, 'get_search_backend', BrokenIndex)
+        before = Title.objects.count()
+        with pytest.raises(RuntimeError):
+            admin_client.post(self.url, format='json', data=[{
+                'name': 'Без индекса', 'year': 2000,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+            }])
+        assert Title.objects.count() == before, (
+            'Если поисковый индекс не записан, произведения не должны '
+            'сохраняться: вставка и индекс — одна транзакция.'
+        )
@@ -0,0 +1,99 @@
+from contextlib import suppress
+from http import HTTPStatus
+
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Leaderboard, Title
+from reviews.signals import refresh_leaderboard
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Leaderboard:
+    url = '/api/v1/titles/top/'
+
+    def top(self, client, query=''):
+        response = client.get(f'{self.url}?{query}')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{self.url}` должен быть доступен без токена.'
+        )
+        return [title['id'] for title in response.json()]
+
+    def test_01_top_titles(self, settings, client, admin_client, user_client,
+                           moderator_client):
+        settings.LEADERBOARD_MIN_REVIEWS = 2
+        titles, categories, genres = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        create_single_review(user_client, first, 'text', 6)
+        create_single_review(user_client, second, 'text', 9)
+        assert self.top(client) == [], (
+            'Произведения с числом отзывов меньше порога не должны '
+            'попадать в список лучших.'
+        )
+
+        create_single_review(moderator_client, first, 'text', 8)
+        create_single_review(moderator_client, second, 'text', 9)
+        assert self.top(client) == [second, first]
+        assert self.top(client, 'limit=1') == [second]
+        assert self.top(client, f'genre={genres[0]["slug"]}') == [first]
+        assert self.top(client, f'category={categories[1]["slug"]}') == [
+            second
+        ]
+
+        admin_client.patch(f'/api/v1/titles/{first}/', data={
+            'genre': [genres[2]['slug']],
+            'category': categories[0]['slug'],
+        })
+        assert self.top(client, f'genre={genres[2]["slug"]}') == [
+            second, first
+        ], 'Список лучших должен следовать за сменой жанров произведения.'
+
+        admin_client.delete(f'/api/v1/titles/{second}/')
+        assert self.top(client) == [first]
+
+    def test_02_invalid_limit(self, client):
+        response = client.get(f'{self.url}?limit=1000')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_single_refresh_and_unique_rows(self, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(url, data={
+                'name': 'Новое имя', 'genre': [genres[1]['slug']],
+                'category': categories[1]['slug'],
+            })
+        assert response.status_code == HTTPStatus.OK
+        refreshes = [query for query in context.captured_queries
+                     if query['sql'].startswith(
+                         'DELETE FROM "reviews_leaderboard"'
+                     )]
+        assert len(refreshes) == 1, (
+            'Изменение произведения должно пересобирать его строки '
+            'в списке лучших один раз.'
+        )
+
+        title = Title.objects.get(pk=titles[0]['id'])
+        Leaderboard.objects.create(title=title, rating=5, score_count=3)
+        with pytest.raises(IntegrityError):
+            Leaderboard.objects.create(title=title, rating=5, score_count=3)
+
+    def test_04_refresh_after_savepoint_rollback(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        with CaptureQueriesContext(connection) as context:
+            with transaction.atomic():
+                with suppress(RuntimeError), transaction.atomic():
+                    refresh_leaderboard(title_id)
+                    raise RuntimeError
+                refresh_leaderboard(title_id)
+        refreshes = [query for query in context.captured_queries
+                     if query['sql'].startswith(
+                         'DELETE FROM "reviews_leaderboard"'
+                     )]
+        assert len(refreshes) == 1, (
+            'После отката точки сохранения пересборка лидеров должна '
+            'выполняться при фиксации внешней транзакции, один раз.'
+        )
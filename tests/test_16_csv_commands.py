@@ -0,0 +1,197 @@
+import csv
+import os
+import shutil
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.management.csv_data import (TABLES, dependency_levels,
+                                         open_table)
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            User)
+from reviews.search import get_search_backend
+from tests.conftest import MANAGE_PATH
+
+DATA_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def csv_count(directory, table):
+    with open_table(directory, table) as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16CsvCommands:
+
+    def check_loaded(self, directory=DATA_PATH):
+        for table in TABLES:
+            assert table.model.objects.count() == csv_count(
+                directory, table
+            ), (
+                f'Проверьте, что команда `load_csv` загружает все строки '
+                f'файла `{table.name}.csv`.'
+            )
+
+    def test_01_load_csv(self):
+        out = StringIO()
+        call_command('load_csv', path=DATA_PATH, batch_size=7, stdout=out)
+        self.check_loaded()
+        assert 'строк/с' in out.getvalue(), (
+            'Команда `load_csv` должна сообщать скорость загрузки таблиц.'
+        )
+        title = Title.objects.get(pk=1)
+        assert title.score_count == title.reviews.count(), (
+            'После загрузки команда `load_csv` должна пересчитывать '
+            'рейтинги произведений.'
+        )
+
+    def test_02_load_csv_parallel(self):
+        call_command('load_csv', path=DATA_PATH, jobs=2, stdout=StringIO())
+        self.check_loaded()
+
+    def test_03_dependency_levels(self):
+        levels = [{table.name for table in level}
+                  for level in dependency_levels()]
+        assert levels == [
+            {'users', 'category', 'genre'}, {'titles'},
+            {'review', 'genre_title'}, {'comments'},
+        ], (
+            'Проверьте, что таблицы группируются по внешним ключам: '
+            'каждая группа зависит только от предыдущих.'
+        )
+
+    def test_04_upsert(self, tmp_path):
+        directory = tmp_path / 'data'
+        shutil.copytree(DATA_PATH, directory)
+        call_command('load_csv', path=directory, upsert=True,
+                     stdout=StringIO())
+        self.check_loaded(directory)
+
+        out = StringIO()
+        call_command('load_csv', path=directory, upsert=True, stdout=out)
+        assert 'titles: добавлено 0, обновлено 0' in out.getvalue(), (
+            'Повторная загрузка с `--upsert` не должна трогать '
+            'неизменившиеся строки.'
+        )
+        assert 'Пересчитано произведений: 0' in out.getvalue(), (
+            'Без изменений `--upsert` не должен пересчитывать рейтинги '
+            'и поиск.'
+        )
+
+        titles = directory / 'titles.csv'
+        lines = titles.read_text(encoding='utf-8').splitlines()
+        lines[1] = '1,Новое название,1994,1'
+        lines.append('100,Новое произведение,2000,2')
+        titles.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        comments = directory / 'comments.csv'
+        lines = comments.read_text(encoding='utf-8').splitlines()
+        comments.write_text('\n'.join(lines[:2]) + '\n', encoding='utf-8')
+
+        out = StringIO()
+        call_command('load_csv', path=directory, upsert=True,
+                     delete_missing=True, stdout=out)
+        assert 'titles: добавлено 1, обновлено 1, удалено 0' in (
+            out.getvalue()
+        ), (
+            'Команда `load_csv --upsert` должна вставлять только новые и '
+            'обновлять только изменившиеся строки.'
+        )
+        self.check_loaded(directory)
+        assert Title.objects.get(pk=1).name == 'Новое название'
+        assert 'Пересчитано произведений: 2' in out.getvalue(), (
+            'После `--upsert` пересчитываться должны только задетые '
+            'произведения.'
+        )
+        found = get_search_backend().search(Title.objects.all(), 'новое')
+        assert {title.pk for title in found} == {1, 100}
+        assert not Comment.objects.filter(pk=2).exists(), (
+            'С `--delete-missing` строки, которых нет в файле, '
+            'должны удаляться.'
+        )
+
+    def test_05_load_csv_fast(self):
+        out = StringIO()
+        call_command('load_csv', path=DATA_PATH, fast=True, batch_size=7,
+                     stdout=out)
+        self.check_loaded()
+        assert 'строк/с' in out.getvalue()
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.isoformat() == '21:08:21.567000', (
+            'Проверьте, что `load_csv --fast` переносит даты из файла.'
+        )
+        title = Title.objects.get(pk=1)
+        assert title.score_count == title.reviews.count(), (
+            'После загрузки с `--fast` рейтинги произведений должны '
+            'пересчитываться.'
+        )
+        assert title.updated_at is not None
+        user = User.objects.get(pk=100)
+        assert user.is_active and user.date_joined is not None, (
+            'Столбцы, которых нет в файле, должны заполняться значениями '
+            'по умолчанию полей модели.'
+        )
+        new_title = Title.objects.create(name='Новое', year=2000)
+        assert new_title.pk > max(
+            Title.objects.exclude(pk=new_title.pk).values_list('pk', flat=True)
+        )
+
+    def test_06_dump_csv_round_trip(self, tmp_path):
+        call_command('load_csv', path=DATA_PATH, stdout=StringIO())
+        first, second = tmp_path / 'first', tmp_path / 'second'
+        call_command('dump_csv', path=first, gzip=True, chunk_size=7,
+                     stdout=StringIO())
+        assert (first / 'titles.csv.gz').exists(), (
+            'С `--gzip` команда `dump_csv` должна писать файлы `.csv.gz`.'
+        )
+        for model in (User, Title, Genre, Category):
+            model.objects.all().delete()
+
+        call_command('load_csv', path=first, stdout=StringIO())
+        self.check_loaded()
+        call_command('dump_csv', path=second, stdout=StringIO())
+        for table in TABLES:
+            with open_table(first, table) as dumped, open_table(
+                second, table
+            ) as redumped:
+                assert dumped.read() == redumped.read(), (
+                    f'Проверьте, что таблица `{table.name}` без изменений '
+                    'проходит через `dump_csv` и `load_csv`.'
+                )
+
+    def test_07_dump_csv_since(self, tmp_path):
+        call_command('load_csv', path=DATA_PATH, stdout=StringIO())
+        call_command('dump_csv', path=tmp_path, since='2100-01-01',
+                     stdout=StringIO())
+        for table in TABLES:
+            assert csv_count(tmp_path, table) == 0, (
+                'С `--since` команда `dump_csv` должна выгружать только '
+                'строки, изменённые после указанной даты.'
+            )
+
+    def test_08_generate_data(self, tmp_path):
+        options = dict(users=50, category=3, genre=5, titles=40, reviews=600,
+                       comments=100, seed=7)
+        for directory in ('first', 'second'):
+            call_command('generate_data', path=tmp_path / directory,
+                         no_load=True, stdout=StringIO(), **options)
+        for table in TABLES:
+            assert (tmp_path / 'first' / f'{table.name}.csv').read_text(
+                encoding='utf-8'
+            ) == (tmp_path / 'second' / f'{table.name}.csv').read_text(
+                encoding='utf-8'
+            ), 'Команда `generate_data` должна быть воспроизводима по seed.'
+
+        call_command('generate_data', stdout=StringIO(), **options)
+        assert User.objects.count() == 50
+        assert Title.objects.count() == 40
+        assert Review.objects.count() == 600
+        assert Comment.objects.count() == 100
+        counts = sorted(
+            Title.objects.values_list('score_count', flat=True), reverse=True
+        )
+        assert counts[0] >= 3 * 600 / 40, (
+            'Отзывы должны распределяться с перекосом: у немногих '
+            'произведений — очень много отзывов.'
+        )
+        assert counts[0] <= 50
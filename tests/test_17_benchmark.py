@@ -0,0 +1,46 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Benchmark:
+
+    def test_01_benchmark_api(self, tmp_path):
+        output = tmp_path / 'benchmark.json'
+        call_command('benchmark_api', current_db=True, output=output,
+                     repeat=2, users=30, titles=20, reviews=200,
+                     comments=50, stdout=StringIO())
+        results = json.loads(output.read_text(encoding='utf-8'))
+        routes = results['routes']
+        for name in ('title-list', 'title-detail', 'reviews-list',
+                     'comments-list', 'user-list-search', 'signup',
+                     'get-token'):
+            assert name in routes, (
+                f'Проверьте, что `benchmark_api` замеряет маршрут `{name}`.'
+            )
+        for name, result in routes.items():
+            assert result['status'] < 400, (
+                f'Сценарий `{name}` команды `benchmark_api` завершился '
+                f'ответом со статусом {result["status"]}.'
+            )
+            assert result['p50_ms'] <= result['p95_ms']
+        assert routes['title-list']['queries'] > 0
+        assert routes['title-list']['rows'] > 0, (
+            'Команда `benchmark_api` должна считать строки, выбранные '
+            'SQL-запросами.'
+        )
+
+    def test_02_cache_not_throttled(self, tmp_path):
+        output = tmp_path / 'benchmark.json'
+        call_command('benchmark_api', current_db=True, output=output,
+                     repeat=12, cache=True, users=30, titles=20,
+                     reviews=200, comments=50, stdout=StringIO())
+        routes = json.loads(output.read_text(encoding='utf-8'))['routes']
+        for name in ('signup', 'signup-existing', 'get-token'):
+            assert routes[name]['errors'] == 0, (
+                f'Повторы сценария `{name}` не должны упираться в лимиты '
+                'частоты запросов.'
+            )
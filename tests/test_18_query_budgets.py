@@ -0,0 +1,25 @@
+import pytest
+
+from api.query_budgets import QUERY_BUDGETS
+from api.urls import router_v1
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18QueryBudgets:
+
+    def test_01_read_actions_have_budgets(self):
+        for _, viewset, _ in router_v1.registry:
+            budgets = QUERY_BUDGETS.get(viewset.__name__, {})
+            assert 'list' in budgets, (
+                f'Добавьте в `QUERY_BUDGETS` бюджет запросов для '
+                f'`{viewset.__name__}.list`.'
+            )
+
+    def test_02_budget_exceeded(self, monkeypatch, client):
+        monkeypatch.setitem(QUERY_BUDGETS, 'GenreViewSet', {'list': 0})
+        with pytest.raises(pytest.fail.Exception) as error:
+            client.get('/api/v1/genres/')
+        assert 'GenreViewSet.list' in str(error.value)
+        assert 'FROM "reviews_genre"' in str(error.value), (
+            'При превышении бюджета тест должен выводить выполненный SQL.'
+        )
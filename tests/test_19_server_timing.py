@@ -0,0 +1,42 @@
+import re
+
+import pytest
+from django.test import Client
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ServerTiming:
+
+    def metrics(self, response):
+        header = response.get('Server-Timing', '')
+        return dict(
+            re.match(r'\s*(\w+);(?:dur=|desc=)"?([\d.]+)"?', part).groups()
+            for part in header.split(',') if part
+        )
+
+    def test_01_disabled_by_default(self, client):
+        response = client.get('/api/v1/titles/')
+        assert not response.has_header('Server-Timing'), (
+            'Без настройки `SERVER_TIMING` заголовок `Server-Timing` не '
+            'должен добавляться.'
+        )
+
+    def test_02_server_timing(self, settings, admin_client):
+        settings.SERVER_TIMING = True
+        create_titles(admin_client)
+        response = Client().get('/api/v1/titles/')
+        metrics = self.metrics(response)
+        for name in ('db', 'queries', 'view', 'render', 'total'):
+            assert name in metrics, (
+                f'Заголовок `Server-Timing` должен содержать метрику '
+                f'`{name}`: {response.get("Server-Timing")}'
+            )
+        assert int(metrics['queries']) > 0
+        assert float(metrics['total']) >= float(metrics['db'])
+
+        response = Client().get('/admin/login/')
+        assert 'total' in self.metrics(response), (
+            'Заголовок `Server-Timing` должен добавляться к каждому ответу.'
+        )
@@ -0,0 +1,77 @@
+from io import StringIO
+from smtplib import SMTPException
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.models import OutboxEmail
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise SMTPException('connection refused')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Outbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    def signup(self, client):
+        response = client.post(self.url_signup, data={
+            'username': 'outbox_user', 'email': 'outbox@yamdb.fake'
+        })
+        assert response.status_code == 200
+        return OutboxEmail.objects.get()
+
+    def test_01_signup_enqueues(self, settings, client):
+        settings.EMAIL_OUTBOX_EAGER = False
+        outbox_before = len(mail.outbox)
+        email = self.signup(client)
+        assert len(mail.outbox) == outbox_before, (
+            'Регистрация должна ставить письмо в очередь, а не отправлять '
+            'его во время запроса.'
+        )
+        assert email.status == OutboxEmail.PENDING
+        assert email.to == 'outbox@yamdb.fake'
+
+        call_command('send_outbox', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before + 1, (
+            'Команда `send_outbox` должна отправлять письма из очереди.'
+        )
+        assert mail.outbox[-1].to == ['outbox@yamdb.fake']
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.SENT
+        assert email.attempts == 1
+
+        call_command('send_outbox', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before + 1, (
+            'Отправленное письмо не должно уходить повторно.'
+        )
+
+    def test_02_retry_with_backoff(self, settings, client):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        settings.EMAIL_BACKEND = 'tests.test_20_outbox.FailingBackend'
+        email = self.signup(client)
+
+        call_command('send_outbox', stdout=StringIO())
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.PENDING, (
+            'После ошибки отправки письмо должно остаться в очереди.'
+        )
+        assert email.next_attempt_at > timezone.now(), (
+            'Повторная отправка должна откладываться.'
+        )
+        assert 'connection refused' in email.last_error
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_outbox', stdout=StringIO())
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.FAILED, (
+            'После EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо должно '
+            'помечаться неотправленным.'
+        )
+        assert email.attempts == 2
@@ -0,0 +1,145 @@
+import os
+import socket
+from io import StringIO
+
+import pytest
+from aiosmtpd.controller import Controller
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+
+from api import mail as mail_module
+from api.mail import claim_spooled
+from reviews.models import OutboxEmail
+
+SESSIONS = []
+
+
+class SessionBackend(EmailBackend):
+    """locmem, запоминающий размер каждой пачки (одно соединение)."""
+
+    def send_messages(self, messages):
+        SESSIONS.append(len(messages))
+        return super().send_messages(messages)
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionRefusedError
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21MailSpool:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.fixture(autouse=True)
+    def spool(self, settings, tmp_path):
+        settings.EMAIL_BACKEND = 'api.mail.SpoolEmailBackend'
+        settings.EMAIL_SPOOL_DIR = tmp_path
+        settings.EMAIL_SPOOL_BACKEND = 'tests.test_21_mail_spool.SessionBackend'
+        SESSIONS.clear()
+        return tmp_path
+
+    def signup(self, client, number):
+        response = client.post(self.url_signup, data={
+            'username': f'spool{number}', 'email': f'spool{number}@yamdb.fake'
+        })
+        assert response.status_code == 200
+
+    def test_01_flush_mail(self, client, spool):
+        outbox_before = len(mail.outbox)
+        for number in (1, 1, 2, 3):
+            self.signup(client, number)
+        assert len(mail.outbox) == outbox_before, (
+            'SpoolEmailBackend должен складывать письма в каталог, '
+            'а не отправлять их.'
+        )
+        assert len(os.listdir(spool)) == 4
+
+        out = StringIO()
+        call_command('flush_mail', batch_size=2, stdout=out)
+        sent = mail.outbox[outbox_before:]
+        assert sorted(message.to[0] for message in sent) == [
+            'spool1@yamdb.fake', 'spool2@yamdb.fake', 'spool3@yamdb.fake'
+        ], (
+            'Команда `flush_mail` должна отправлять одно письмо с кодом '
+            'на адрес, даже если их накопилось несколько.'
+        )
+        assert SESSIONS == [2, 1], (
+            'Команда `flush_mail` должна отправлять каждую пачку за одно '
+            'соединение.'
+        )
+        assert os.listdir(spool) == []
+        assert 'объединено повторных: 1' in out.getvalue()
+
+    def test_02_failed_flush_keeps_mail(self, settings, client, spool):
+        self.signup(client, 1)
+        settings.EMAIL_SPOOL_BACKEND = 'tests.test_21_mail_spool.FailingBackend'
+        with pytest.raises(CommandError):
+            call_command('flush_mail', stdout=StringIO())
+        assert [name.endswith('.json') for name in os.listdir(spool)] == [
+            True
+        ], 'Неотправленные письма должны возвращаться в очередь.'
+
+    def test_03_smtp_stand_in(self, settings, client, spool):
+        received = []
+
+        class Handler:
+            async def handle_DATA(self, server, session, envelope):
+                received.append(envelope.rcpt_tos)
+                return '250 OK'
+
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        controller = Controller(
+            Handler(), hostname='127.0.0.1', port=port
+        )
+        controller.start()
+        try:
+            settings.EMAIL_SPOOL_BACKEND = (
+                'django.core.mail.backends.smtp.EmailBackend'
+            )
+            settings.EMAIL_HOST = '127.0.0.1'
+            settings.EMAIL_PORT = port
+            settings.EMAIL_USE_TLS = False
+            for number in (1, 2):
+                self.signup(client, number)
+            call_command('flush_mail', stdout=StringIO())
+        finally:
+            controller.stop()
+        assert sorted(received) == [
+            ['spool1@yamdb.fake'], ['spool2@yamdb.fake']
+        ]
+
+    def test_04_stale_claim_is_atomic(self, monkeypatch, client, spool):
+        self.signup(client, 1)
+        first = claim_spooled(str(spool))
+        assert len(first) == 1
+        assert claim_spooled(str(spool)) == [], (
+            'Только что захваченное письмо не должно забираться повторно.'
+        )
+        # Два flush_mail одновременно видят одно зависшее письмо.
+        names = os.listdir(spool)
+        monkeypatch.setattr(mail_module.os, 'listdir', lambda path: names)
+        second = claim_spooled(str(spool), stale_after=-1)
+        third = claim_spooled(str(spool), stale_after=-1)
+        assert len(second) == 1 and third == [], (
+            'Зависшее письмо должен забрать только один из параллельных '
+            'запусков `flush_mail`.'
+        )
+        assert not os.path.exists(first[0]) and os.path.exists(second[0])
+
+    def test_05_coalesce_marked_only(self, settings, spool):
+        mail.EmailMessage('Отчёт', 'первый', to=['admin@yamdb.fake']).send()
+        mail.EmailMessage('Отчёт', 'второй', to=['admin@yamdb.fake']).send()
+        out = StringIO()
+        call_command('flush_mail', stdout=out)
+        assert [message.body for message in mail.outbox[-2:]] == [
+            'первый', 'второй'
+        ], (
+            'Команда `flush_mail` должна объединять только письма '
+            'с заголовком ключа объединения.'
+        )
+        assert 'объединено повторных: 0' in out.getvalue()
+        assert OutboxEmail.COALESCE_HEADER not in mail.outbox[-1].extra_headers
@@ -0,0 +1,71 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import SignUpSerializer
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Signup:
+    url_signup = '/api/v1/auth/signup/'
+    data = {'username': 'signup_user', 'email': 'signup@yamdb.fake'}
+
+    def user_queries(self, client, data):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.url_signup, data=data)
+        return response, [
+            query['sql'] for query in context.captured_queries
+            if '"reviews_user"' in query['sql']
+        ]
+
+    def test_01_single_lookup(self, client, django_user_model):
+        response, queries = self.user_queries(client, self.data)
+        assert response.status_code == 200
+        assert len(queries) == 2, (
+            'Регистрация нового пользователя должна выполнять один поиск '
+            'по username или email и одну вставку.'
+        )
+        response, queries = self.user_queries(client, self.data)
+        assert response.status_code == 200
+        assert len(queries) == 1, (
+            'Повторная регистрация должна находить пользователя '
+            'одним запросом.'
+        )
+        for data in ({'username': 'signup_user', 'email': 'other@yamdb.fake'},
+                     {'username': 'other_user', 'email': 'signup@yamdb.fake'}):
+            response, queries = self.user_queries(client, data)
+            assert response.status_code == 400
+            assert len(queries) == 1
+        assert django_user_model.objects.count() == 1
+
+    def test_02_concurrent_signup(self, monkeypatch, client,
+                                  django_user_model):
+        find_user = SignUpSerializer.find_user
+        calls = []
+
+        def stale_find_user(serializer, data):
+            # Первая проверка не видит пользователя, созданного
+            # параллельным запросом.
+            calls.append(data)
+            if len(calls) == 1:
+                return None
+            return find_user(serializer, data)
+
+        django_user_model.objects.create(**self.data)
+        monkeypatch.setattr(SignUpSerializer, 'find_user', stale_find_user)
+        response = client.post(self.url_signup, data=self.data)
+        assert response.status_code == 200, (
+            'Если пользователь с теми же данными создан параллельно, '
+            'регистрация должна вернуть его, а не ошибку.'
+        )
+        assert len(calls) == 2
+
+        calls.clear()
+        response = client.post(self.url_signup, data={
+            'username': 'signup_user', 'email': 'other@yamdb.fake'
+        })
+        assert response.status_code == 400, (
+            'Если username занят параллельным запросом с другим email, '
+            'регистрация должна вернуть ошибку 400.'
+        )
+        assert django_user_model.objects.count() == 1
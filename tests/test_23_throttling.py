@@ -0,0 +1,111 @@
+import pickle
+import time
+
+import pytest
+from django.core.cache.backends.filebased import FileBasedCache
+
+from api.throttling import SlidingWindowThrottle
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23Throttling:
+    url_signup = '/api/v1/auth/signup/'
+    url_token = '/api/v1/auth/token/'
+
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        clock = [6000.0]
+        monkeypatch.setattr(SlidingWindowThrottle, 'timer',
+                            lambda self: clock[0])
+        return clock
+
+    @pytest.fixture
+    def rates(self, settings):
+        def set_rates(**rates):
+            settings.REST_FRAMEWORK = {
+                **settings.REST_FRAMEWORK,
+                'DEFAULT_THROTTLE_RATES': {
+                    'signup.ip': None, 'signup.username': None,
+                    'token.ip': None, 'token.username': None,
+                    **{scope.replace('_', '.'): rate
+                       for scope, rate in rates.items()},
+                },
+            }
+        return set_rates
+
+    def test_01_signup_username(self, clock, rates, client):
+        rates(signup_username='2/min')
+        data = {'username': 'throttled', 'email': 'throttled@yamdb.fake'}
+        for _ in range(2):
+            assert client.post(self.url_signup, data=data).status_code == 200
+        response = client.post(self.url_signup, data=data)
+        assert response.status_code == 429, (
+            'Повторные запросы кода для одного username сверх лимита '
+            'должны получать ответ 429.'
+        )
+        assert int(response['Retry-After']) == 60
+        other = {'username': 'other', 'email': 'other@yamdb.fake'}
+        assert client.post(self.url_signup, data=other).status_code == 200, (
+            'Лимит на username не должен затрагивать других пользователей.'
+        )
+
+    def test_02_token_ip(self, clock, rates, client):
+        rates(token_ip='3/min')
+        for number in range(3):
+            response = client.post(self.url_token, data={
+                'username': f'guess{number}', 'confirmation_code': 'XXXX'
+            })
+            assert response.status_code == 404
+        response = client.post(self.url_token, data={
+            'username': 'guess', 'confirmation_code': 'XXXX'
+        })
+        assert response.status_code == 429, (
+            'Запросы токена с одного адреса сверх лимита должны '
+            'получать ответ 429.'
+        )
+        response = client.post(self.url_token, REMOTE_ADDR='10.0.0.2', data={
+            'username': 'guess', 'confirmation_code': 'XXXX'
+        })
+        assert response.status_code == 404
+
+    def test_03_sliding_window(self, clock, rates, client):
+        rates(token_username='4/min')
+        data = {'username': 'brute', 'confirmation_code': 'XXXX'}
+        clock[0] = 6059.0
+        for _ in range(4):
+            assert client.post(self.url_token, data=data).status_code == 404
+        # Середина следующего окна: предыдущее учитывается наполовину.
+        clock[0] = 6090.0
+        for _ in range(2):
+            assert client.post(self.url_token, data=data).status_code == 404
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == 429, (
+            'Запросы из предыдущего окна должны учитываться с весом '
+            'оставшейся части текущего окна.'
+        )
+        assert int(response['Retry-After']) == 1
+        # Вес предыдущего окна убывает с каждой секундой.
+        clock[0] = 6091.0
+        assert client.post(self.url_token, data=data).status_code == 404
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == 429
+        assert int(response['Retry-After']) == 14
+        clock[0] = 6105.5
+        assert client.post(self.url_token, data=data).status_code == 404
+
+    def test_04_file_cache_keeps_ttl(self, monkeypatch, tmp_path, clock,
+                                     rates, client):
+        cache = FileBasedCache(str(tmp_path), {})
+        monkeypatch.setattr(SlidingWindowThrottle, 'cache', cache)
+        rates(token_ip='10/hour')
+        data = {'username': 'guess', 'confirmation_code': 'XXXX'}
+        for _ in range(3):
+            assert client.post(self.url_token, data=data).status_code == 404
+        key = 'throttle_token.ip_127.0.0.1_1'
+        assert cache.get(key) == 3
+        with open(cache._key_to_file(key), 'rb') as file:
+            expires = pickle.load(file)
+        assert expires - time.time() > 3600, (
+            'Счётчик окна в FileBasedCache должен жить два периода частоты, '
+            'а не срок кэша по умолчанию.'
+        )
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import LRUCache
+from api.cache import get_cache
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24AuthCache:
+    url_me = '/api/v1/users/me/'
+
+    def get_me(self, client):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url_me)
+        assert response.status_code == 200
+        return response, len(context.captured_queries)
+
+    def test_01_no_auth_query(self, user_client):
+        _, queries = self.get_me(user_client)
+        assert queries == 1
+        _, queries = self.get_me(user_client)
+        assert queries == 0, (
+            'Повторный запрос с тем же токеном должен брать пользователя '
+            'из кэша, без запросов к БД.'
+        )
+
+    def test_02_invalidation(self, admin_client, user_client, user):
+        self.get_me(user_client)
+        user_client.patch(self.url_me, data={'bio': 'new bio'})
+        response, _ = self.get_me(user_client)
+        assert response.json()['bio'] == 'new bio', (
+            'После изменения профиля пользователь должен браться из БД '
+            'заново.'
+        )
+
+        admin_client.patch(f'/api/v1/users/{user.username}/',
+                           data={'role': 'admin'})
+        response = user_client.get('/api/v1/users/')
+        assert response.status_code == 200, (
+            'Смена роли администратором должна сразу влиять на права '
+            'пользователя.'
+        )
+
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        response = user_client.get(self.url_me)
+        assert response.status_code == 401, (
+            'Токен удалённого пользователя не должен проходить '
+            'аутентификацию.'
+        )
+
+    def test_03_lru_bounded(self):
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        assert lru.get('b') is None, (
+            'LRU должен вытеснять давно не использованные записи.'
+        )
+        assert lru.get('a') == 1 and lru.get('c') == 3
+
+    def test_04_lru_expiry(self, monkeypatch):
+        lru = LRUCache(2)
+        lru.set('a', 1, timeout=10)
+        lru.set('b', 2)
+        now = time.monotonic()
+        monkeypatch.setattr(time, 'monotonic', lambda: now + 11)
+        assert lru.get('a') is None, (
+            'Запись LRU с timeout не должна находиться после его истечения.'
+        )
+        assert lru.get('b') == 2
+        assert 'a' not in lru.entries
+
+    def test_05_local_user_expires(self, monkeypatch, user_client, user):
+        self.get_me(user_client)
+        # Запись в общем кэше не мешает: проверяется только LRU процесса.
+        get_cache().clear()
+        now = time.monotonic()
+        monkeypatch.setattr(
+            time, 'monotonic',
+            lambda: now + settings.AUTH_USER_CACHE_TIMEOUT + 1
+        )
+        _, queries = self.get_me(user_client)
+        assert queries == 1, (
+            'Пользователь в LRU процесса должен устаревать через '
+            'AUTH_USER_CACHE_TIMEOUT и снова браться из БД.'
+        )
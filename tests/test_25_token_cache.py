@@ -0,0 +1,56 @@
+import hashlib
+import time
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import revoke_token, verified_tokens
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25TokenCache:
+    url_me = '/api/v1/users/me/'
+
+    @pytest.fixture
+    def verifications(self, monkeypatch):
+        calls = []
+        verify = JWTAuthentication.get_validated_token
+
+        def counted(self, raw_token):
+            calls.append(raw_token)
+            return verify(self, raw_token)
+
+        monkeypatch.setattr(JWTAuthentication, 'get_validated_token',
+                            counted)
+        return calls
+
+    def test_01_verified_once(self, verifications, user_client, token_user):
+        for _ in range(3):
+            assert user_client.get(self.url_me).status_code == 200
+        assert len(verifications) == 1, (
+            'Подпись одного и того же токена должна проверяться один раз.'
+        )
+
+        digest = hashlib.sha256(token_user['access'].encode()).hexdigest()
+        token, _ = verified_tokens.get(digest)
+        verified_tokens.set(digest, (token, time.time() - 1))
+        assert user_client.get(self.url_me).status_code == 200
+        assert len(verifications) == 2, (
+            'После истечения срока токен должен проверяться заново.'
+        )
+
+    def test_02_revoked(self, user_client, token_user):
+        assert user_client.get(self.url_me).status_code == 200
+        revoke_token(AccessToken(token_user['access']))
+        assert user_client.get(self.url_me).status_code == 401, (
+            'Отозванный токен не должен проходить аутентификацию, даже '
+            'если уже был проверен.'
+        )
+
+    def test_03_benchmark_auth(self):
+        out = StringIO()
+        call_command('benchmark_auth', repeat=10, stdout=out)
+        assert 'экономия на запрос' in out.getvalue()